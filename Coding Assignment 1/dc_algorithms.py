@@ -1,7 +1,55 @@
 # -*- coding: utf-8 -*-
+import itertools
+import json
+import multiprocessing
+import multiprocessing.pool
+import multiprocessing.sharedctypes
+import os
+import platform
+import sys
+import time
 import numpy
 # STOCK_PRICES  = [100,113,110,85,105,102,86,63,81,101,94,106,101,79,94,90,97]
 STOCK_PRICE_CHANGES = [13, -3, -25, 20, -3, -16, -23, 18, 20, -7, 12, -5, -22, 15, -4, 7]
+# Tile edge used by matrix_multiply_blocked, 3 float64 tiles of 64x64 fit in a
+# 128KB L2 cache
+MATRIX_BLOCK_SIZE = 64
+# Blocks of this size or smaller are handed by matrix_multiply_strassen to the
+# dense kernel
+STRASSEN_CUTOFF = 128
+# matrix_multiply switches an operand to the sparse kernels at or below this
+# fraction of non zeros
+SPARSE_DENSITY_THRESHOLD = 0.05
+# Per machine values of MATRIX_BLOCK_SIZE and STRASSEN_CUTOFF, written by
+# benchmark_matrix_multiply(save=True)
+MATRIX_TUNING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  'dc_algorithms_tuning.json')
+
+
+def _read_matrix_tuning(path=MATRIX_TUNING_FILE):
+    """
+    All saved tunings, keyed by machine name; empty when the file is missing or
+    unreadable.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def load_matrix_tuning(path=MATRIX_TUNING_FILE):
+    """
+    Set MATRIX_BLOCK_SIZE and STRASSEN_CUTOFF to the values tuned for this
+    machine, if any. Runs at import time.
+    """
+    global MATRIX_BLOCK_SIZE, STRASSEN_CUTOFF
+    tuning = _read_matrix_tuning(path).get(platform.node(), {})
+    MATRIX_BLOCK_SIZE = tuning.get('block_size', MATRIX_BLOCK_SIZE)
+    STRASSEN_CUTOFF = tuning.get('strassen_cutoff', STRASSEN_CUTOFF)
+
+
+load_matrix_tuning()
 
 
 # Implement pseudo code from the book
@@ -119,29 +167,525 @@ def find_maximum_sub_array_iterative(A, low=0, high=-1):
         return (0, 0)
 
 
-def square_matrix_multiply(A, B):
+def find_maximum_sub_array_kadane(A, low=0, high=None):
     """
-    Return the product AB of matrix multiplication.
+    Return a tuple (i,j,sum) where A[i:j+1] is the maximum subarray.
+    Kadane's single pass scan: O(n) time and O(1) extra memory.
+    A can be any iterable; when all values are negative the largest
+    single value is returned. high is inclusive, None scans to the end.
+
+    >>> find_maximum_sub_array_kadane(STOCK_PRICE_CHANGES, 0, 15)
+    (7, 10, 43)
+    >>> find_maximum_sub_array_kadane(iter([-5, -2, -7]))
+    (1, 1, -2)
+    """
+    stop = None if high is None else high + 1
+    values = enumerate(itertools.islice(A, low, stop), low)
+    try:
+        left_position, maximum = next(values)
+    except StopIteration:
+        raise ValueError(
+            "find_maximum_sub_array_kadane() arg is an empty sequence")
+    right_position = current_position = left_position
+    current_sum = maximum
+    for i, value in values:
+        if current_sum <= 0:  # a non positive prefix never helps, restart here
+            current_sum = value
+            current_position = i
+        else:
+            current_sum += value
+        if current_sum > maximum:
+            maximum = current_sum
+            left_position = current_position
+            right_position = i
+    return (left_position, right_position, maximum)
+
+
+def find_maximum_sub_array_batch(A):
+    """
+    Return a tuple of arrays (i,j,sum) with the maximum subarray
+    A[r][i[r]:j[r]+1] of every row r. A is a 2-D array (series x time) or a
+    ragged list of non empty series. Every row is solved at once with prefix
+    sums and running minimums along the time axis; ties are broken like
+    find_maximum_sub_array_kadane.
+
+    >>> series = [STOCK_PRICE_CHANGES, [-5, -2, -7]]
+    >>> starts, ends, sums = find_maximum_sub_array_batch(series)
+    >>> starts.tolist(), ends.tolist(), sums.tolist()
+    ([7, 1], [10, 1], [43, -2])
+    """
+    if isinstance(A, numpy.ndarray) and A.ndim == 2:
+        values = A
+        lengths = None
+    else:
+        series = [numpy.asarray(row) for row in A]
+        lengths = numpy.array([len(row) for row in series])
+        assert lengths.min() > 0, "every series needs at least one value"
+        flat = numpy.concatenate(series)
+        values = numpy.zeros((len(series), lengths.max()), dtype=flat.dtype)
+        # zero padding keeps prefix sums flat
+        values[numpy.arange(lengths.max()) < lengths[:, None]] = flat
+    if values.dtype.kind in 'biu':
+        dtype = numpy.int64
+    else:
+        dtype = values.dtype
+    row_count, column_count = values.shape
+    prefix = numpy.zeros((row_count, column_count + 1), dtype=dtype)
+    numpy.cumsum(values, axis=1, out=prefix[:, 1:])
+    # best sum ending at t is prefix[t+1] - min(prefix[0..t]), started right
+    # after the last minimum
+    running_min = numpy.minimum.accumulate(prefix[:, :-1], axis=1)
+    positions = numpy.arange(column_count)
+    starts = numpy.where(prefix[:, :-1] == running_min, positions, 0)
+    numpy.maximum.accumulate(starts, axis=1, out=starts)
+    gains = prefix[:, 1:] - running_min
+    if lengths is not None:
+        if dtype == numpy.int64:
+            lowest = numpy.iinfo(dtype).min
+        else:
+            lowest = numpy.finfo(dtype).min
+        gains[positions >= lengths[:, None]] = lowest
+    ends = gains.argmax(axis=1)
+    rows = numpy.arange(row_count)
+    return (starts[rows, ends], ends, gains[rows, ends])
+
+
+def _leaf_summary(i, value):
+    """
+    Summary of the one element subarray A[i:i+1]. A summary is the tuple
+    (total, prefix, prefix_end, suffix, suffix_start, best, best_low,
+    best_high) holding the sum of the range, its best prefix, its best suffix
+    and its maximum subarray.
+    """
+    return (value, value, i, value, i, value, i, i)
+
+
+def _combine_summaries(left, right):
+    """
+    Summary of two adjacent ranges, left followed by right. Same combine step
+    as find_maximum_crossing_sub_array; None is the empty range.
+
+    >>> _combine_summaries(_leaf_summary(0, 13), _leaf_summary(1, -3))
+    (10, 13, 0, 10, 0, 13, 0, 0)
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    total = left[0] + right[0]
+    prefix, prefix_end = left[1], left[2]
+    if left[0] + right[1] > prefix:
+        prefix, prefix_end = left[0] + right[1], right[2]
+    suffix, suffix_start = right[3], right[4]
+    if right[0] + left[3] > suffix:
+        suffix, suffix_start = right[0] + left[3], left[4]
+    best, best_low, best_high = left[5], left[6], left[7]
+    if right[5] > best:
+        best, best_low, best_high = right[5], right[6], right[7]
+    if left[3] + right[1] > best:
+        best, best_low, best_high = left[3] + right[1], left[4], right[2]
+    return (total, prefix, prefix_end, suffix, suffix_start,
+            best, best_low, best_high)
+
+
+class _SummaryTree(object):
+    """
+    Array backed segment tree of range summaries over a fixed number of slots.
+    Node k has children 2k and 2k+1, leaves start at self.size.
+    """
+    def __init__(self, slots):
+        self.size = 1
+        while self.size < slots:
+            self.size *= 2
+        self.tree = [None]*(2*self.size)
+
+    def build(self):
+        """
+        Recompute every internal node from the leaves in O(n).
+        """
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = _combine_summaries(self.tree[2*node],
+                                                 self.tree[2*node+1])
+
+    def set(self, position, summary):
+        """
+        Replace the summary of one slot and refresh its ancestors in O(log n).
+        """
+        node = position + self.size
+        self.tree[node] = summary
+        node //= 2
+        while node:
+            self.tree[node] = _combine_summaries(self.tree[2*node],
+                                                 self.tree[2*node+1])
+            node //= 2
+
+    def summary(self, low, high):
+        """
+        Summary of the slots low..high (inclusive) in O(log n).
+        """
+        left_summary = None
+        right_summary = None
+        low += self.size
+        high += self.size + 1
+        while low < high:
+            if low & 1:
+                left_summary = _combine_summaries(left_summary, self.tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                right_summary = _combine_summaries(self.tree[high],
+                                                   right_summary)
+            low //= 2
+            high //= 2
+        return _combine_summaries(left_summary, right_summary)
+
+
+class MaximumSubArrayIndex(_SummaryTree):
+    """
+    Precomputed index over a series answering maximum subarray queries on any
+    range. Built in O(n); query and update are O(log n). The index lives in one
+    flat list, so it pickles as is and dump/load store it as JSON.
+
+    >>> index = MaximumSubArrayIndex(STOCK_PRICE_CHANGES)
+    >>> index.query(0, 15)
+    (7, 10, 43)
+    >>> index.query(0, 6)
+    (3, 3, 20)
+    >>> index.update(5, 30)
+    >>> index.query(0, 6)
+    (3, 5, 47)
+    """
+    def __init__(self, A=()):
+        values = list(A)
+        super(MaximumSubArrayIndex, self).__init__(max(len(values), 1))
+        self.length = len(values)
+        for i, value in enumerate(values):
+            self.tree[self.size + i] = _leaf_summary(i, value)
+        self.build()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        assert 0 <= i < self.length, "index out of range"
+        return self.tree[self.size + i][0]
+
+    def update(self, i, value):
+        """
+        Replace A[i] with value.
+        """
+        assert 0 <= i < self.length, "index out of range"
+        self.set(i, _leaf_summary(i, value))
+
+    def query(self, low=0, high=None):
+        """
+        Return a tuple (i,j,sum) where A[i:j+1] is the maximum subarray of
+        A[low:high+1].
+        """
+        if high is None:
+            high = self.length - 1
+        assert 0 <= low <= high < self.length, "invalid range"
+        summary = self.summary(low, high)
+        return (summary[6], summary[7], summary[5])
+
+    def dump(self, f):
+        """
+        Write the index to an open file as JSON.
+        """
+        json.dump({'length': self.length, 'tree': self.tree}, f)
+
+    @classmethod
+    def load(cls, f):
+        """
+        Read an index written by dump without recomputing it.
+
+        >>> import os, tempfile
+        >>> handle, path = tempfile.mkstemp(suffix='.json')
+        >>> os.close(handle)
+        >>> with open(path, 'w') as f:
+        ...     MaximumSubArrayIndex([13, -3, -25, 20]).dump(f)
+        >>> with open(path) as f:
+        ...     MaximumSubArrayIndex.load(f).query()
+        (3, 3, 20)
+        >>> os.remove(path)
+        """
+        state = json.load(f)
+        index = cls()
+        index.length = state['length']
+        index.size = len(state['tree']) // 2
+        index.tree = [None if node is None else tuple(node)
+                      for node in state['tree']]
+        return index
+
+
+class MaximumSubArrayTracker(object):
+    """
+    Online maximum subarray over a stream of values, O(1) state per update.
+    best is the tuple (i,j,sum) of find_maximum_sub_array_kadane over
+    everything seen so far.
+
+    >>> tracker = MaximumSubArrayTracker()
+    >>> tracker.extend([13, -3, -25, 20, -3, -16, -23, 18])
+    >>> tracker.best
+    (3, 3, 20)
+    >>> tracker.update(20)
+    >>> tracker.best
+    (7, 8, 38)
+    """
+    def __init__(self):
+        super(MaximumSubArrayTracker, self).__init__()
+        self.count = 0
+        self.best = None
+        self._current_sum = 0
+        self._current_position = 0
+
+    def __len__(self):
+        return self.count
+
+    def update(self, value):
+        """
+        Feed the next value of the stream.
+        """
+        if self.count == 0 or self._current_sum <= 0:
+            self._current_sum = value
+            self._current_position = self.count
+        else:
+            self._current_sum += value
+        if self.best is None or self._current_sum > self.best[2]:
+            self.best = (self._current_position, self.count, self._current_sum)
+        self.count += 1
+
+    def extend(self, values):
+        """
+        Feed a chunk of values of the stream.
+        """
+        for value in values:
+            self.update(value)
+
+
+class SlidingMaximumSubArray(object):
+    """
+    Maximum subarray restricted to the last window values of a stream. Values
+    live in a circular buffer backed by a segment tree, so update and best are
+    O(log window). best is the tuple (i,j,sum) using the position of each value
+    in the whole stream.
+
+    >>> sliding = SlidingMaximumSubArray(4)
+    >>> sliding.extend([13, -3, -25, 20, -3, -16])
+    >>> sliding.best
+    (3, 3, 20)
+    >>> sliding.extend([-23, 18])
+    >>> sliding.best
+    (7, 7, 18)
+    """
+    def __init__(self, window):
+        super(SlidingMaximumSubArray, self).__init__()
+        assert window > 0
+        self.window = window
+        self.count = 0
+        self._summaries = _SummaryTree(window)
+
+    def __len__(self):
+        return min(self.count, self.window)
+
+    def update(self, value):
+        """
+        Feed the next value of the stream, evicting the oldest one once the
+        window is full.
+        """
+        self._summaries.set(self.count % self.window,
+                            _leaf_summary(self.count, value))
+        self.count += 1
+
+    def extend(self, values):
+        """
+        Feed a chunk of values of the stream.
+        """
+        for value in values:
+            self.update(value)
+
+    @property
+    def best(self):
+        """
+        Maximum subarray of the current window, None before the first value.
+        """
+        if self.count == 0:
+            return None
+        oldest = self.count % self.window
+        if self.count < self.window or oldest == 0:
+            summary = self._summaries.summary(0, len(self) - 1)
+        else:  # the buffer wrapped: oldest..end comes before 0..oldest-1
+            summary = _combine_summaries(
+                self._summaries.summary(oldest, self.window - 1),
+                self._summaries.summary(0, oldest - 1))
+        return (summary[6], summary[7], summary[5])
+
+
+def _chunk_summary(A, offset=0):
+    """
+    Range summary (see _leaf_summary) of a whole chunk, computed with
+    vectorized prefix sums. offset is the position of A[0] in the full series.
+
+    >>> _chunk_summary([20, -3, -16, -23, 18], 3)
+    (-4, 20, 3, 18, 7, 20, 3, 3)
+    """
+    A = numpy.asarray(A)
+    dtype = numpy.int64 if A.dtype.kind in 'biu' else A.dtype
+    prefix = numpy.cumsum(A, dtype=dtype)
+    total = prefix[-1]
+    prefix_end = int(prefix.argmax())
+    # sum of A[:k] for every start k
+    before = numpy.empty_like(prefix)
+    before[0] = 0
+    before[1:] = prefix[:-1]
+    # the latest minimum gives the shortest suffix
+    suffix_start = len(A) - 1 - int(before[::-1].argmin())
+    # best sum ending at t is prefix[t] - min(before[:t+1]), computed in place
+    gains = numpy.minimum.accumulate(before)
+    numpy.subtract(prefix, gains, out=gains)
+    best_end = int(gains.argmax())
+    best_start = best_end - int(before[best_end::-1].argmin())
+    return (total, prefix[prefix_end], offset + prefix_end,
+            total - before[suffix_start], offset + suffix_start,
+            gains[best_end], offset + best_start, offset + best_end)
+
+
+_shared_series = None
+
+
+def _share_series(A):
+    """
+    Pool initializer: workers inherit the series instead of receiving pickled
+    chunks.
+    """
+    global _shared_series
+    _shared_series = A
+
+
+def _shared_chunk_summary(bounds):
+    low, high = bounds
+    return _chunk_summary(_shared_series[low:high], low)
+
+
+def find_maximum_sub_array_parallel(A, processes=None, chunk_size=None):
+    """
+    Return a tuple (i,j,sum) where A[i:j+1] is the maximum subarray. A is split
+    into chunks, a process pool summarises every chunk with a vectorized kernel
+    and the summaries are reduced pairwise in a tree like
+    find_maximum_sub_array_recursive.
+
+    >>> find_maximum_sub_array_parallel(STOCK_PRICE_CHANGES, 2, chunk_size=5)
+    (7, 10, 43)
+    >>> found = find_maximum_sub_array_parallel(STOCK_PRICE_CHANGES, 1)
+    >>> all(type(x) is int for x in found)
+    True
+    """
+    A = numpy.asarray(A)
+    assert A.ndim == 1 and len(A) > 0
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(A) // (4*processes)))
+    bounds = [(low, min(low + chunk_size, len(A)))
+              for low in range(0, len(A), chunk_size)]
+    if processes == 1 or len(bounds) == 1:
+        summaries = [_chunk_summary(A[low:high], low) for low, high in bounds]
+    else:
+        pool = multiprocessing.Pool(processes, _share_series, (A,))
+        try:
+            summaries = pool.map(_shared_chunk_summary, bounds)
+        finally:
+            pool.close()
+            pool.join()
+    while len(summaries) > 1:
+        if len(summaries) % 2:
+            summaries.append(None)
+        summaries = [_combine_summaries(summaries[k], summaries[k+1])
+                     for k in range(0, len(summaries), 2)]
+    summary = summaries[0]
+    # plain Python numbers, like the other find_maximum_sub_array variants
+    best = summary[5]
+    if isinstance(best, numpy.generic):
+        best = best.item()
+    return (int(summary[6]), int(summary[7]), best)
+
+
+def _exact_dtype(A, B, growth=1):
+    """
+    Integer dtype in which AB is computed without overflow: int64 when no dot
+    product (times growth, the magnitude gained by intermediate sums) can
+    exceed it, else Python ints.
+
+    >>> _exact_dtype(numpy.array([[2**31]]), numpy.array([[2**31]]))
+    dtype('int64')
+    >>> _exact_dtype(numpy.array([[2**32]]), numpy.array([[2**31]]))
+    dtype('O')
+    """
+    if A.size == 0 or B.size == 0:
+        return numpy.dtype(numpy.int64)
+    largest_a = max(abs(int(A.min())), abs(int(A.max())))
+    largest_b = max(abs(int(B.min())), abs(int(B.max())))
+    bound = largest_a * largest_b * A.shape[1] * growth
+    if bound <= numpy.iinfo(numpy.int64).max:
+        return numpy.dtype(numpy.int64)
+    return numpy.dtype(object)
+
+
+def _product_operands(A, B, dtype=None, exact=False, growth=1):
+    """
+    A and B converted to the dtype the product is computed in, and the dtype it
+    is returned in. dtype defaults to numpy.result_type(A, B), so int32, int64
+    and float32 inputs keep their type. With exact=True an integer product is
+    accumulated in a dtype that cannot overflow.
+    """
+    A = numpy.asarray(A)
+    B = numpy.asarray(B)
+    dtype = numpy.result_type(A, B) if dtype is None else numpy.dtype(dtype)
+    compute = dtype
+    if exact and dtype.kind in 'biu':
+        compute = _exact_dtype(A, B, growth)
+    return (A.astype(compute, copy=False), B.astype(compute, copy=False),
+            dtype)
+
+
+def _product_result(C, dtype):
+    """
+    C converted to dtype, raising OverflowError rather than wrapping integers
+    around.
+    """
+    if C.dtype == dtype:
+        return C
+    if dtype.kind in 'biu' and C.size:
+        limits = numpy.iinfo(dtype)
+        if C.min() < limits.min or C.max() > limits.max:
+            raise OverflowError("matrix product does not fit in %s" % dtype)
+    return C.astype(dtype)
+
+
+def square_matrix_multiply(A, B, dtype=None, exact=False):
+    """
+    Return the product AB of matrix multiplication. The result keeps the input
+    dtype unless dtype is given; with exact=True integer products match exact
+    arithmetic or raise OverflowError.
 
     >>> A = [[36, 54, 24, 38], [54, 50, 19, 68], [26, 79, 57, 49], [94, 59, 20, 97]]
     >>> B = [[46, 68, 27, 38], [57, 94, 74, 20], [46, 0, 52, 69], [20, 65, 37, 26]]
     >>> square_matrix_multiply(A, B)
-    array([[  6598.,   9994.,   7622.,   5092.],
-           [  7568.,  12792.,   8662.,   6131.],
-           [  9301.,  12379.,  11325.,   7775.],
-           [ 10547.,  18243.,  11533.,   8654.]])
+    array([[ 6598,  9994,  7622,  5092],
+           [ 7568, 12792,  8662,  6131],
+           [ 9301, 12379, 11325,  7775],
+           [10547, 18243, 11533,  8654]])
     """
-    A = numpy.asarray(A)
-    B = numpy.asarray(B)
+    A, B, dtype = _product_operands(A, B, dtype, exact)
     assert A.shape == B.shape
     assert A.shape == A.T.shape
     dimensions = A.shape
-    C = numpy.zeros(dimensions)
+    C = numpy.zeros(dimensions, dtype=A.dtype)
     for i in range(0, dimensions[0]):
         for j in range(0, dimensions[0]):
             for k in range(0, dimensions[0]):
                 C[i][j] = C[i][j] + (A[i][k]*B[k][j])
-    return C
+    return _product_result(C, dtype)
 
 
 def square_matrix_multiply_strassens(A, B):
@@ -151,11 +695,11 @@ def square_matrix_multiply_strassens(A, B):
 
     >>> A = [[36, 54, 24, 38], [54, 50, 19, 68], [26, 79, 57, 49], [94, 59, 20, 97]]
     >>> B = [[46, 68, 27, 38], [57, 94, 74, 20], [46, 0, 52, 69], [20, 65, 37, 26]]
-    >>> square_matrix_multiply(A, B)
-    array([[  6598.,   9994.,   7622.,   5092.],
-           [  7568.,  12792.,   8662.,   6131.],
-           [  9301.,  12379.,  11325.,   7775.],
-           [ 10547.,  18243.,  11533.,   8654.]])
+    >>> square_matrix_multiply_strassens(A, B)
+    array([[ 6598,  9994,  7622,  5092],
+           [ 7568, 12792,  8662,  6131],
+           [ 9301, 12379, 11325,  7775],
+           [10547, 18243, 11533,  8654]])
     """
     A = numpy.asarray(A)
     B = numpy.asarray(B)
@@ -163,7 +707,8 @@ def square_matrix_multiply_strassens(A, B):
     assert A.shape == A.T.shape
     assert (len(A) & (len(A) - 1)) == 0, "A is not a power of 2"
     dimensions = A.shape
-    C = numpy.zeros(shape=(dimensions[0],dimensions[0]))
+    C = numpy.zeros(shape=(dimensions[0], dimensions[0]),
+                    dtype=numpy.result_type(A, B))
     if dimensions[0] == 1:
         C[0][0] = A[0][0] * B[0][0]
     else:
@@ -197,6 +742,843 @@ def square_matrix_multiply_strassens(A, B):
     pass
 
 
+def matrix_multiply_blocked(A, B, block_size=None, dtype=None, exact=False,
+                            out=None):
+    """
+    Return the product AB of matrix multiplication for any A (n x m) and
+    B (m x p). A, B and C are cut into block_size x block_size tiles and every
+    tile product is a vectorized numpy.dot accumulated into its tile of C, so
+    the working set stays in cache. block_size defaults to MATRIX_BLOCK_SIZE.
+    dtype and exact work as in square_matrix_multiply. out, when given, is
+    overwritten with the product; it needs the shape and compute dtype of C.
+
+    >>> A = [[36, 54, 24, 38], [54, 50, 19, 68],
+    ...      [26, 79, 57, 49], [94, 59, 20, 97]]
+    >>> B = [[46, 68, 27, 38], [57, 94, 74, 20],
+    ...      [46, 0, 52, 69], [20, 65, 37, 26]]
+    >>> matrix_multiply_blocked(A, B, block_size=3)
+    array([[ 6598,  9994,  7622,  5092],
+           [ 7568, 12792,  8662,  6131],
+           [ 9301, 12379, 11325,  7775],
+           [10547, 18243, 11533,  8654]])
+    >>> matrix_multiply_blocked([[1, 2, 3]], [[4], [5], [6]])
+    array([[32]])
+    >>> A = numpy.array([[40000, 40000]], dtype=numpy.int32)
+    >>> matrix_multiply_blocked(A, A.T, dtype=numpy.int64, exact=True)
+    array([[3200000000]])
+    >>> matrix_multiply_blocked(A, A.T, exact=True)
+    Traceback (most recent call last):
+    ...
+    OverflowError: matrix product does not fit in int32
+    >>> big = [[2**62, 2**62]]
+    >>> C = matrix_multiply_blocked(big, numpy.transpose(big), dtype=object)
+    >>> print(C[0, 0])
+    42535295865117307932921825928971026432
+    """
+    A, B, dtype = _product_operands(A, B, dtype, exact)
+    assert A.ndim == 2 and B.ndim == 2
+    assert A.shape[1] == B.shape[0], "inner dimensions of A and B differ"
+    if block_size is None:
+        block_size = MATRIX_BLOCK_SIZE
+    rows, inner = A.shape
+    columns = B.shape[1]
+    if out is None:
+        C = numpy.zeros((rows, columns), dtype=A.dtype)
+    else:
+        assert out.shape == (rows, columns), "out has the wrong shape"
+        C = out
+        C[...] = 0
+    for i in range(0, rows, block_size):
+        for k in range(0, inner, block_size):
+            A_tile = A[i:i+block_size, k:k+block_size]
+            for j in range(0, columns, block_size):
+                B_tile = B[k:k+block_size, j:j+block_size]
+                C[i:i+block_size, j:j+block_size] += numpy.dot(A_tile, B_tile)
+    return _product_result(C, dtype)
+
+
+def _strassen_padded_size(n, cutoff):
+    """
+    Smallest size c*2^k >= n with c <= cutoff, and k, the number of Strassen
+    levels above the leaves.
+
+    >>> _strassen_padded_size(100, 16)
+    (104, 3)
+    """
+    levels = 0
+    while -(-n // 2**levels) > cutoff:
+        levels += 1
+    return (-(-n // 2**levels) * 2**levels, levels)
+
+
+def _strassen_workspace(size, levels, dtype):
+    """
+    Scratch buffers reused across the recursion: per level two operand sums and
+    one product, each half the size.
+    """
+    arena = []
+    for level in range(levels):
+        size //= 2
+        arena.append(tuple(numpy.empty((size, size), dtype=dtype)
+                           for buffer in range(3)))
+    return arena
+
+
+def _strassen_into(A, B, C, arena, level=0):
+    """
+    Write the product AB into C with Strassen's seven products, all temporaries
+    taken from arena.
+    """
+    if level == len(arena):
+        C[...] = numpy.dot(A, B)
+        return
+    S, T, P = arena[level]
+    partition = len(S)
+    A11, A12 = A[:partition, :partition], A[:partition, partition:]
+    A21, A22 = A[partition:, :partition], A[partition:, partition:]
+    B11, B12 = B[:partition, :partition], B[:partition, partition:]
+    B21, B22 = B[partition:, :partition], B[partition:, partition:]
+    C11, C12 = C[:partition, :partition], C[:partition, partition:]
+    C21, C22 = C[partition:, :partition], C[partition:, partition:]
+
+    # P1 = A11 (B12 - B22)
+    _strassen_into(A11, numpy.subtract(B12, B22, out=T), P, arena, level + 1)
+    C12[...] = P
+    C22[...] = P
+    # P2 = (A11 + A12) B22
+    _strassen_into(numpy.add(A11, A12, out=S), B22, P, arena, level + 1)
+    C12 += P
+    numpy.negative(P, out=C11)
+    # P3 = (A21 + A22) B11
+    _strassen_into(numpy.add(A21, A22, out=S), B11, P, arena, level + 1)
+    C21[...] = P
+    C22 -= P
+    # P4 = A22 (B21 - B11)
+    _strassen_into(A22, numpy.subtract(B21, B11, out=T), P, arena, level + 1)
+    C11 += P
+    C21 += P
+    # P5 = (A11 + A22)(B11 + B22)
+    _strassen_into(numpy.add(A11, A22, out=S), numpy.add(B11, B22, out=T),
+                   P, arena, level + 1)
+    C11 += P
+    C22 += P
+    # P6 = (A12 - A22)(B21 + B22)
+    _strassen_into(numpy.subtract(A12, A22, out=S),
+                   numpy.add(B21, B22, out=T), P, arena, level + 1)
+    C11 += P
+    # P7 = (A11 - A21)(B11 + B12)
+    _strassen_into(numpy.subtract(A11, A21, out=S),
+                   numpy.add(B11, B12, out=T), P, arena, level + 1)
+    C22 -= P
+
+
+def _strassen_serial(A, B, levels, C=None):
+    """
+    Product of the square matrices A and B after levels Strassen splits,
+    written into C when given.
+    """
+    dtype = numpy.result_type(A, B)
+    if C is None:
+        C = numpy.empty(A.shape, dtype=dtype)
+    _strassen_into(A, B, C, _strassen_workspace(len(A), levels, dtype))
+    return C
+
+
+def _pad_matrix(A, size):
+    """
+    A zero padded to size x size, A itself when it already has that shape.
+    """
+    if A.shape == (size, size):
+        return A
+    padded = numpy.zeros((size, size), dtype=A.dtype)
+    padded[:A.shape[0], :A.shape[1]] = A
+    return padded
+
+
+def _strassen_pays_off(n, m, p, cutoff):
+    """
+    Whether an (n x m)(m x p) product is worth Strassen's method. All three
+    dimensions are padded to the largest one, so only roughly square products
+    whose every dimension exceeds the cutoff qualify; a 1 x n by n x 1 product
+    would otherwise become a product of n x n blocks.
+
+    >>> [_strassen_pays_off(n, m, p, 16)
+    ...  for n, m, p in [(100, 90, 120), (1, 1000, 1), (8, 8, 8)]]
+    [True, False, False]
+    """
+    return min(n, m, p) > cutoff and max(n, m, p) <= 2 * min(n, m, p)
+
+
+def _strassen_operands_padded(A, B, cutoff, dtype, exact):
+    """
+    Checked operands of a Strassen product with their compute dtype, the return
+    dtype, the padded size and the number of recursion levels. The size is None
+    when the shapes are too small or too far from square for Strassen and the
+    dense kernel should be used.
+    """
+    A = numpy.asarray(A)
+    B = numpy.asarray(B)
+    assert A.ndim == 2 and B.ndim == 2
+    assert A.shape[1] == B.shape[0], "inner dimensions of A and B differ"
+    if cutoff is None:
+        cutoff = STRASSEN_CUTOFF
+    if not _strassen_pays_off(A.shape[0], A.shape[1], B.shape[1], cutoff):
+        A, B, dtype = _product_operands(A, B, dtype, exact, 1)
+        return (A, B, dtype, None, 0)
+    size, levels = _strassen_padded_size(max(A.shape + B.shape), cutoff)
+    # every level doubles the operand sums of A and of B, the final combine
+    # adds up to 4 products
+    A, B, dtype = _product_operands(A, B, dtype, exact, 4**(levels + 1))
+    return (A, B, dtype, size, levels)
+
+
+def matrix_multiply_strassen(A, B, cutoff=None, dtype=None, exact=False):
+    """
+    Return the product AB of matrix multiplication using Strassen's method for
+    any A (n x m) and B (m x p). Blocks of size cutoff or smaller (default
+    STRASSEN_CUTOFF) use the dense numpy.dot kernel. The operands are zero
+    padded to c*2^k with c <= cutoff, and all temporaries come from one
+    workspace allocated up front and reused by every recursive call. Products
+    with a dimension at or below the cutoff, or far from square, use the dense
+    kernel. dtype and exact work as in square_matrix_multiply.
+
+    >>> A = [[36, 54, 24], [54, 50, 19], [26, 79, 57]]
+    >>> B = [[46, 68, 27], [57, 94, 74], [46, 0, 52]]
+    >>> matrix_multiply_strassen(A, B, cutoff=1)
+    array([[5838, 7524, 6216],
+           [6208, 8372, 6146],
+           [8321, 9194, 9512]])
+    """
+    A, B, dtype, size, levels = _strassen_operands_padded(A, B, cutoff, dtype,
+                                                          exact)
+    if size is None:
+        return _product_result(A.dot(B), dtype)
+    C = _strassen_serial(_pad_matrix(A, size), _pad_matrix(B, size), levels)
+    return _product_result(C[:A.shape[0], :B.shape[1]], dtype)
+
+
+def _strassen_operands(A, B):
+    """
+    The operand pairs of Strassen's seven products P1..P7 of AB.
+    """
+    partition = len(A) // 2
+    A11, A12 = A[:partition, :partition], A[:partition, partition:]
+    A21, A22 = A[partition:, :partition], A[partition:, partition:]
+    B11, B12 = B[:partition, :partition], B[:partition, partition:]
+    B21, B22 = B[partition:, :partition], B[partition:, partition:]
+    return [(A11, B12 - B22), (A11 + A12, B22), (A21 + A22, B11),
+            (A22, B21 - B11), (A11 + A22, B11 + B22), (A12 - A22, B21 + B22),
+            (A11 - A21, B11 + B12)]
+
+
+def _strassen_combine(P1, P2, P3, P4, P5, P6, P7):
+    """
+    The product matrix assembled from Strassen's seven products.
+    """
+    partition = len(P1)
+    C = numpy.empty((2*partition, 2*partition), dtype=P1.dtype)
+    C[:partition, :partition] = P5 + P4 - P2 + P6
+    C[:partition, partition:] = P1 + P2
+    C[partition:, :partition] = P3 + P4
+    C[partition:, partition:] = P1 + P5 - P3 - P7
+    return C
+
+
+_shared_strassen = None
+
+
+def _share_strassen_buffers(raw_operands, raw_products, shape, dtype, levels):
+    """
+    Pool initializer: workers map numpy views over the shared memory operand
+    and product buffers. The RawArrays themselves are passed, not views of
+    them: under the spawn start method (Windows, macOS) a view would arrive as
+    a pickled private copy and the products written to it would never reach the
+    parent.
+    """
+    global _shared_strassen
+    operands = _shared_view(raw_operands, (shape[0], 2) + shape[1:], dtype)
+    products = _shared_view(raw_products, shape, dtype)
+    _shared_strassen = (operands, products, levels)
+
+
+def _shared_strassen_product(k):
+    operands, products, levels = _shared_strassen
+    _strassen_serial(operands[k, 0], operands[k, 1], levels, products[k])
+
+
+def _shared_buffer(shape, dtype):
+    """
+    Shared memory RawArray for an array of the given shape and dtype, and a
+    numpy view of it.
+    """
+    dtype = numpy.dtype(dtype)
+    size = int(numpy.prod(shape)) * dtype.itemsize
+    raw = multiprocessing.sharedctypes.RawArray('b', size)
+    return raw, _shared_view(raw, shape, dtype)
+
+
+def _shared_view(raw, shape, dtype):
+    return numpy.frombuffer(raw, dtype=numpy.dtype(dtype)).reshape(shape)
+
+
+def _strassen_products_in_processes(leaves, levels, processes):
+    shape = (len(leaves),) + leaves[0][0].shape
+    dtype = numpy.result_type(*leaves[0])
+    raw_operands, operands = _shared_buffer((len(leaves), 2) + shape[1:],
+                                            dtype)
+    for k, (left, right) in enumerate(leaves):
+        operands[k, 0] = left
+        operands[k, 1] = right
+    raw_products, products = _shared_buffer(shape, dtype)
+    pool = multiprocessing.Pool(processes, _share_strassen_buffers,
+                                (raw_operands, raw_products, shape, dtype.str,
+                                 levels))
+    try:
+        pool.map(_shared_strassen_product, range(len(leaves)))
+    finally:
+        pool.close()
+        pool.join()
+    return list(products)
+
+
+def _strassen_products_in_threads(leaves, levels, processes):
+    pool = multiprocessing.pool.ThreadPool(processes)
+    try:
+        return pool.map(
+            lambda pair: _strassen_serial(pair[0], pair[1], levels), leaves)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def matrix_multiply_strassen_parallel(A, B, cutoff=None, depth=1,
+                                      processes=None, executor='thread',
+                                      dtype=None, exact=False):
+    """
+    Return the product AB of matrix multiplication, like
+    matrix_multiply_strassen, with the 7**depth products of the top depth
+    recursion levels evaluated concurrently. executor 'thread' runs them in a
+    thread pool (numpy releases the GIL in the kernels); 'process' runs them in
+    a process pool reading operands from and writing products to shared memory,
+    so no block is pickled. Below depth every product runs serially. dtype and
+    exact work as in square_matrix_multiply; Python int (object) products
+    always use threads.
+
+    >>> A = [[36, 54, 24, 38], [54, 50, 19, 68],
+    ...      [26, 79, 57, 49], [94, 59, 20, 97]]
+    >>> B = [[46, 68, 27, 38], [57, 94, 74, 20],
+    ...      [46, 0, 52, 69], [20, 65, 37, 26]]
+    >>> matrix_multiply_strassen_parallel(A, B, cutoff=1, depth=2, processes=2,
+    ...                                   executor='process')
+    array([[ 6598,  9994,  7622,  5092],
+           [ 7568, 12792,  8662,  6131],
+           [ 9301, 12379, 11325,  7775],
+           [10547, 18243, 11533,  8654]])
+    """
+    assert executor in ('thread', 'process'), \
+        "executor is 'thread' or 'process'"
+    A, B, dtype, size, levels = _strassen_operands_padded(A, B, cutoff, dtype,
+                                                          exact)
+    if size is None:
+        return _product_result(A.dot(B), dtype)
+    if A.dtype == object:
+        executor = 'thread'  # object pointers cannot live in shared memory
+    depth = min(depth, levels)
+    leaves = [(_pad_matrix(A, size), _pad_matrix(B, size))]
+    for level in range(depth):
+        leaves = [pair for left, right in leaves
+                  for pair in _strassen_operands(left, right)]
+    if depth == 0:
+        products = [_strassen_serial(leaves[0][0], leaves[0][1], levels)]
+    elif executor == 'thread':
+        products = _strassen_products_in_threads(leaves, levels - depth,
+                                                 processes)
+    else:
+        products = _strassen_products_in_processes(leaves, levels - depth,
+                                                   processes)
+    for level in range(depth):
+        products = [_strassen_combine(*products[k:k+7])
+                    for k in range(0, len(products), 7)]
+    return _product_result(products[0][:A.shape[0], :B.shape[1]], dtype)
+
+
+class CSRMatrix(object):
+    """
+    Compressed sparse row matrix. The non zeros of row i are
+    data[indptr[i]:indptr[i+1]], in the columns indices[indptr[i]:indptr[i+1]].
+    The transpose is the CSC form. Memory and multiply time grow with the
+    number of non zeros, not with the shape.
+
+    >>> S = CSRMatrix.from_dense([[0, 2, 0], [0, 0, 0], [3, 0, 4]])
+    >>> S.nnz, S.shape
+    (3, (3, 3))
+    >>> S.dot([[1, 1], [1, 0], [0, 1]])
+    array([[2, 0],
+           [0, 0],
+           [3, 7]])
+    >>> S.dot(S).to_dense()
+    array([[ 0,  0,  0],
+           [ 0,  0,  0],
+           [12,  6, 16]])
+    """
+    def __init__(self, data, indices, indptr, shape):
+        super(CSRMatrix, self).__init__()
+        self.data = numpy.asarray(data)
+        self.indices = numpy.asarray(indices, dtype=numpy.intp)
+        self.indptr = numpy.asarray(indptr, dtype=numpy.intp)
+        self.shape = tuple(shape)
+
+    @classmethod
+    def from_dense(cls, A):
+        A = numpy.asarray(A)
+        rows, columns = numpy.nonzero(A)
+        indptr = numpy.zeros(A.shape[0] + 1, dtype=numpy.intp)
+        numpy.cumsum(numpy.bincount(rows, minlength=A.shape[0]),
+                     out=indptr[1:])
+        return cls(A[rows, columns], columns, indptr, A.shape)
+
+    @classmethod
+    def from_coordinates(cls, rows, columns, values, shape):
+        """
+        Matrix holding the sum of the values given for each (row, column) pair.
+        """
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        columns = numpy.asarray(columns, dtype=numpy.intp)
+        values = numpy.asarray(values)
+        keys = rows * shape[1] + columns
+        order = numpy.argsort(keys, kind='mergesort')
+        keys = keys[order]
+        first = numpy.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        starts = numpy.flatnonzero(first)
+        if len(starts):
+            sums = numpy.add.reduceat(values[order], starts)
+        else:
+            sums = values[:0]
+        keep = sums != 0
+        keys = keys[starts][keep]
+        indptr = numpy.zeros(shape[0] + 1, dtype=numpy.intp)
+        numpy.cumsum(numpy.bincount(keys // shape[1], minlength=shape[0]),
+                     out=indptr[1:])
+        return cls(sums[keep], keys % shape[1], indptr, shape)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @property
+    def density(self):
+        return float(self.nnz) / max(1, self.shape[0] * self.shape[1])
+
+    def row_numbers(self):
+        """
+        Row of every stored non zero.
+        """
+        return numpy.repeat(numpy.arange(self.shape[0]),
+                            numpy.diff(self.indptr))
+
+    def to_dense(self):
+        A = numpy.zeros(self.shape, dtype=self.data.dtype)
+        A[self.row_numbers(), self.indices] = self.data
+        return A
+
+    def transpose(self):
+        return CSRMatrix.from_coordinates(self.indices, self.row_numbers(),
+                                          self.data, self.shape[::-1])
+
+    def dot(self, B):
+        """
+        Product of this matrix with a dense array (dense result) or another
+        CSRMatrix (sparse result).
+        """
+        if isinstance(B, CSRMatrix):
+            return self._dot_sparse(B)
+        B = numpy.asarray(B)
+        assert self.shape[1] == B.shape[0], \
+            "inner dimensions of A and B differ"
+        C = numpy.zeros((self.shape[0], B.shape[1]),
+                        dtype=numpy.result_type(self.data, B))
+        filled = numpy.diff(self.indptr) > 0
+        if filled.any():
+            # rows are stored in order, so each row of C is one reduceat
+            # segment of the scaled rows of B
+            partial = self.data[:, None] * B[self.indices]
+            C[filled] = numpy.add.reduceat(partial, self.indptr[:-1][filled],
+                                           axis=0)
+        return C
+
+    def _dot_sparse(self, B):
+        """
+        Sparse product: every non zero A[i,k] is paired with the non zeros of
+        row k of B, then equal (i,j) partial products are summed.
+        """
+        assert self.shape[1] == B.shape[0], \
+            "inner dimensions of A and B differ"
+        counts = numpy.diff(B.indptr)[self.indices]
+        before = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        positions = (numpy.repeat(B.indptr[self.indices], counts) +
+                     numpy.arange(counts.sum()) - before)
+        return CSRMatrix.from_coordinates(
+            numpy.repeat(self.row_numbers(), counts), B.indices[positions],
+            numpy.repeat(self.data, counts) * B.data[positions],
+            (self.shape[0], B.shape[1]))
+
+
+def _as_operand(A):
+    """
+    A as a CSRMatrix when its measured density is at most
+    SPARSE_DENSITY_THRESHOLD, else as an array.
+    """
+    if isinstance(A, CSRMatrix):
+        return A
+    A = numpy.asarray(A)
+    if numpy.count_nonzero(A) <= SPARSE_DENSITY_THRESHOLD * A.size:
+        return CSRMatrix.from_dense(A)
+    return A
+
+
+def matrix_multiply(A, B):
+    """
+    Return the product AB, choosing sparse or dense kernels from the density of
+    the operands. The result is a CSRMatrix when both operands are given as
+    CSRMatrix, an array otherwise.
+
+    >>> A = [[0, 0, 5], [0, 0, 0], [0, 0, 0]]
+    >>> matrix_multiply(A, [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+    array([[35, 40, 45],
+           [ 0,  0,  0],
+           [ 0,  0,  0]])
+    """
+    sparse_result = isinstance(A, CSRMatrix) and isinstance(B, CSRMatrix)
+    A = _as_operand(A)
+    B = _as_operand(B)
+    if isinstance(A, CSRMatrix):
+        C = A.dot(B)
+    elif isinstance(B, CSRMatrix):
+        C = B.transpose().dot(A.T).T  # AB = (B^T A^T)^T
+    else:
+        C = matrix_multiply_blocked(A, B)
+    if isinstance(C, CSRMatrix) and not sparse_result:
+        return C.to_dense()
+    return C
+
+
+def matrix_chain_order(dimensions):
+    """
+    Matrix chain order from chapter 15 for matrices A0..An-1 where Ai is
+    dimensions[i] x dimensions[i+1]. Return tables (m, s): m[i][j] is the least
+    number of scalar multiplications for Ai..Aj and s[i][j] the k where that
+    product splits into (Ai..Ak)(Ak+1..Aj).
+
+    >>> m, s = matrix_chain_order([30, 35, 15, 5, 10, 20, 25])
+    >>> m[0][5]
+    15125
+    >>> matrix_chain_parenthesization(s, 0, 5)
+    '((A0(A1A2))((A3A4)A5))'
+    """
+    n = len(dimensions) - 1
+    m = [[0]*n for i in range(n)]
+    s = [[0]*n for i in range(n)]
+    for length in range(2, n + 1):
+        for i in range(0, n - length + 1):
+            j = i + length - 1
+            m[i][j] = None
+            for k in range(i, j):
+                cost = (m[i][k] + m[k+1][j] +
+                        dimensions[i]*dimensions[k+1]*dimensions[j+1])
+                if m[i][j] is None or cost < m[i][j]:
+                    m[i][j] = cost
+                    s[i][j] = k
+    return (m, s)
+
+
+def matrix_chain_parenthesization(s, i, j):
+    """
+    The optimal parenthesization of Ai..Aj from the s table of
+    matrix_chain_order.
+    """
+    if i == j:
+        return 'A' + str(i)
+    return ('(' + matrix_chain_parenthesization(s, i, s[i][j]) +
+            matrix_chain_parenthesization(s, s[i][j] + 1, j) + ')')
+
+
+def _chain_product(matrices, s, i, j, multiply, free_buffers):
+    """
+    Product of matrices[i..j] following s, and whether it lives in an
+    intermediate buffer. Without multiply, products go through
+    matrix_multiply_blocked into buffers recycled from free_buffers, keyed by
+    (shape, dtype).
+    """
+    if i == j:
+        return (matrices[i], False)
+    left, left_is_buffer = _chain_product(matrices, s, i, s[i][j], multiply,
+                                          free_buffers)
+    right, right_is_buffer = _chain_product(matrices, s, s[i][j] + 1, j,
+                                            multiply, free_buffers)
+    if multiply is None:
+        key = ((left.shape[0], right.shape[1]), numpy.result_type(left, right))
+        buffers = free_buffers.get(key)
+        out = buffers.pop() if buffers else numpy.empty(key[0], dtype=key[1])
+        C = matrix_multiply_blocked(left, right, out=out)
+    else:
+        C = multiply(left, right)
+    for operand, is_buffer in ((left, left_is_buffer),
+                               (right, right_is_buffer)):
+        if is_buffer:
+            key = (operand.shape, operand.dtype)
+            free_buffers.setdefault(key, []).append(operand)
+    return (C, multiply is None)
+
+
+def matrix_chain_multiply(matrices, multiply=None):
+    """
+    Return the product of a chain of matrices, multiplied in the order found by
+    matrix_chain_order. multiply(A, B) is the kernel for each pairwise product;
+    by default matrix_multiply_blocked, writing into intermediate buffers that
+    are reused once their value has been consumed.
+
+    >>> A = numpy.arange(6).reshape(2, 3)
+    >>> matrix_chain_multiply([A, A.T, A, [[1], [1], [1]]])
+    array([[183],
+           [642]])
+    """
+    matrices = [numpy.asarray(A) for A in matrices]
+    for left, right in zip(matrices, matrices[1:]):
+        assert left.shape[1] == right.shape[0], \
+            "inner dimensions of the chain differ"
+    dimensions = [matrices[0].shape[0]] + [A.shape[1] for A in matrices]
+    m, s = matrix_chain_order(dimensions)
+    return _chain_product(matrices, s, 0, len(matrices) - 1, multiply, {})[0]
+
+
+def _out_of_core_panels(shape_a, shape_b, itemsize, memory_budget):
+    """
+    Rows of A and of B loaded per panel by matrix_multiply_out_of_core, and
+    whether B stays resident. Holds an A panel (rows x m), a B panel
+    (rows x p), the C panel (rows x p) and the kernel's product.
+
+    >>> _out_of_core_panels((1000, 1000), (1000, 1000), 8, 4*2**20)
+    (131, 131, False)
+    >>> _out_of_core_panels((5000, 100), (100, 100), 8, 10*2**20)
+    (4335, 100, True)
+    """
+    budget = memory_budget // itemsize
+    rows, inner = shape_a
+    columns = shape_b[1]
+    if inner*columns + inner + 2*columns <= budget:
+        panel = (budget - inner*columns) // (inner + 2*columns)
+        return (min(rows, panel), inner, True)
+    panel = budget // (inner + 3*columns)
+    if panel < 1:
+        raise ValueError("memory_budget cannot hold one row of A, B and C")
+    return (min(rows, panel), min(inner, panel), False)
+
+
+def matrix_multiply_out_of_core(A, B, C, memory_budget, kernel=None):
+    """
+    Write the product AB into C for matrices too large for memory, typically
+    numpy.memmap files. A row panel of A is loaded once and multiplied by the
+    row panels of B, read front to back (or kept resident when B fits), into a
+    C panel that is written once, so every file is read and written
+    sequentially and at most memory_budget bytes of panels are held.
+    kernel(A_panel, B_panel) defaults to matrix_multiply_blocked. Returns C.
+
+    >>> import os, shutil, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> A = numpy.memmap(os.path.join(folder, 'A'), dtype=numpy.int64,
+    ...                  mode='w+', shape=(6, 5))
+    >>> A[:] = numpy.arange(30).reshape(6, 5)
+    >>> C = numpy.memmap(os.path.join(folder, 'C'), dtype=numpy.int64,
+    ...                  mode='w+', shape=(6, 6))
+    >>> _ = matrix_multiply_out_of_core(A, A.T, C, memory_budget=200)
+    >>> bool((C == numpy.dot(A, A.T)).all())
+    True
+    >>> del A, C
+    >>> shutil.rmtree(folder)
+    """
+    assert A.shape[1] == B.shape[0], "inner dimensions of A and B differ"
+    assert C.shape == (A.shape[0], B.shape[1]), "C has the wrong shape"
+    if kernel is None:
+        kernel = matrix_multiply_blocked
+    rows, inner = A.shape
+    # size the panels for the widest element so mixed dtypes stay within the
+    # budget
+    itemsize = max(A.dtype.itemsize, B.dtype.itemsize, C.dtype.itemsize)
+    panel_rows, panel_inner, resident = _out_of_core_panels(
+        A.shape, B.shape, itemsize, memory_budget)
+    B_panel = numpy.array(B) if resident else None
+    for i in range(0, rows, panel_rows):
+        A_panel = numpy.array(A[i:i+panel_rows])
+        C_panel = numpy.zeros((len(A_panel), C.shape[1]), dtype=C.dtype)
+        for k in range(0, inner, panel_inner):
+            if resident:
+                B_rows = B_panel[k:k+panel_inner]
+            else:
+                B_rows = numpy.array(B[k:k+panel_inner])
+            C_panel += kernel(A_panel[:, k:k+panel_inner], B_rows)
+        C[i:i+panel_rows] = C_panel
+    if hasattr(C, 'flush'):
+        C.flush()
+    return C
+
+
+def _best_time(multiply, A, B, repeat):
+    """
+    Fastest of repeat runs of multiply(A, B) in seconds.
+    """
+    best = None
+    for run in range(repeat):
+        start = time.time()
+        multiply(A, B)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _report_peak_memory(multiply, A, B, connection):
+    import resource
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')  # restart the peak RSS count from the current RSS
+        except IOError:
+            pass
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs
+    scale = 1 if sys.platform == 'darwin' else 1024
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    multiply(A, B)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    connection.send((after - before) * scale)
+
+
+def _peak_memory(multiply, A, B):
+    """
+    Bytes of resident memory multiply(A, B) needs on top of its inputs,
+    measured in a fresh child process. 'unavailable' without the POSIX resource
+    module or fork (Windows): the benchmarked functions are lambdas, which a
+    spawned child could not unpickle. 'failed' when the child dies before
+    reporting, for example on a MemoryError.
+    """
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        return 'unavailable'
+    if not hasattr(os, 'fork'):
+        return 'unavailable'
+    receiver, sender = multiprocessing.Pipe(False)
+    child = multiprocessing.Process(target=_report_peak_memory,
+                                    args=(multiply, A, B, sender))
+    child.start()
+    sender.close()  # so recv() sees EOF if the child dies without sending
+    try:
+        peak = receiver.recv()
+    except EOFError:
+        peak = 'failed'
+    receiver.close()
+    child.join()
+    if child.exitcode != 0:
+        return 'failed'
+    return peak
+
+
+def _benchmark_candidates(size, block_sizes, cutoffs, naive_limit):
+    """
+    (algorithm, parameter, function) triples to benchmark for one matrix size.
+    """
+    candidates = [('numpy.dot', None, numpy.dot)]
+    if size <= naive_limit:
+        candidates.append(('naive', None, square_matrix_multiply))
+    for block_size in block_sizes:
+        candidates.append(('blocked', block_size,
+                           lambda A, B, block_size=block_size:
+                           matrix_multiply_blocked(A, B, block_size)))
+    for cutoff in cutoffs:
+        candidates.append(('strassen', cutoff,
+                           lambda A, B, cutoff=cutoff:
+                           matrix_multiply_strassen(A, B, cutoff)))
+    return candidates
+
+
+def _fastest_parameter(records, algorithm):
+    """
+    Parameter of algorithm with the least total time over every size and dtype
+    benchmarked.
+    """
+    totals = {}
+    for record in records:
+        if record['algorithm'] == algorithm:
+            parameter = record['parameter']
+            totals[parameter] = totals.get(parameter, 0) + record['seconds']
+    return min(totals, key=totals.get)
+
+
+def save_matrix_tuning(block_size, strassen_cutoff, path=MATRIX_TUNING_FILE):
+    """
+    Store the tuned constants for this machine and apply them to the running
+    module.
+    """
+    tuning = _read_matrix_tuning(path)
+    tuning[platform.node()] = {'block_size': block_size,
+                               'strassen_cutoff': strassen_cutoff}
+    with open(path, 'w') as f:
+        json.dump(tuning, f, indent=2, sort_keys=True)
+    load_matrix_tuning(path)
+
+
+def benchmark_matrix_multiply(sizes=(64, 128, 256, 512),
+                              dtypes=('float64', 'float32'),
+                              block_sizes=(32, 64, 128, 256),
+                              cutoffs=(32, 64, 128, 256),
+                              repeat=3, naive_limit=32, save=False):
+    """
+    Time every multiply algorithm on random n x n matrices for each size and
+    dtype. The naive triple loop only runs up to naive_limit. Returns one dict
+    per run with algorithm, parameter (block size or cutoff), size, dtype,
+    seconds, gflops and peak_bytes. With save=True the fastest block size and
+    Strassen cutoff are written to MATRIX_TUNING_FILE.
+
+    >>> records = benchmark_matrix_multiply(sizes=(8,), dtypes=('int64',),
+    ...                                     block_sizes=(4,), cutoffs=(2,),
+    ...                                     repeat=1)
+    >>> sorted(set(record['algorithm'] for record in records))
+    ['blocked', 'naive', 'numpy.dot', 'strassen']
+    """
+    records = []
+    for dtype in dtypes:
+        for size in sizes:
+            A = numpy.random.uniform(-99, 99, (size, size)).astype(dtype)
+            B = numpy.random.uniform(-99, 99, (size, size)).astype(dtype)
+            candidates = _benchmark_candidates(size, block_sizes, cutoffs,
+                                               naive_limit)
+            for algorithm, parameter, multiply in candidates:
+                seconds = _best_time(multiply, A, B, repeat)
+                gflops = 2.0 * size**3 / max(seconds, 1e-9) / 1e9
+                records.append({'algorithm': algorithm,
+                                'parameter': parameter, 'size': size,
+                                'dtype': dtype, 'seconds': seconds,
+                                'gflops': gflops,
+                                'peak_bytes': _peak_memory(multiply, A, B)})
+    if save:
+        save_matrix_tuning(_fastest_parameter(records, 'blocked'),
+                           _fastest_parameter(records, 'strassen'))
+    return records
+
+
+def print_benchmark(records):
+    """
+    Print benchmark_matrix_multiply records as a table.
+    """
+    row = '%-10s %9s %6s %8s %10s %8s %12s'
+    print(row % ('algorithm', 'parameter', 'size', 'dtype', 'seconds',
+                 'GFLOP/s', 'peak bytes'))
+    for record in records:
+        print(row % (record['algorithm'], record['parameter'], record['size'],
+                     record['dtype'], '%.5f' % record['seconds'],
+                     '%.3f' % record['gflops'], record['peak_bytes']))
+
+
 def test():
     C = [numpy.random.randint(-99, 99)]*1
     array_length = numpy.random.randint(1, 20)
@@ -207,25 +1589,52 @@ def test():
     crossing_sub_array = find_maximum_crossing_sub_array(C, 0, (len(C)-1)/2, len(C)-1)
     recursive_sub_array = find_maximum_sub_array_recursive(C, 0, len(C)-1)
     iterative_sub_array = find_maximum_sub_array_iterative(C, 0, len(C)-1)
+    kadane_sub_array = find_maximum_sub_array_kadane(C)
+    tracker = MaximumSubArrayTracker()
+    tracker.extend(C)
+    sliding = SlidingMaximumSubArray(5)
+    sliding.extend(C)
+    batch_sub_arrays = find_maximum_sub_array_batch([C, C[::-1]])
+    index = MaximumSubArrayIndex(C)
+    parallel_sub_array = find_maximum_sub_array_parallel(C, processes=2)
     print(C)
     print(brute_force_sub_array)
     print(crossing_sub_array)
     print(recursive_sub_array)
     print(iterative_sub_array)
+    print(kadane_sub_array)
+    print(tracker.best)
+    print(sliding.best)
+    print(batch_sub_arrays)
+    print(index.query(0, (len(C)-1)//2))
+    print(parallel_sub_array)
 
     matrix_size = 2**numpy.random.randint(1, 3)
     A = numpy.random.randint(99, size=(matrix_size, matrix_size))
     B = numpy.random.randint(99, size=(matrix_size, matrix_size))
     square_matrix = square_matrix_multiply(A, B)
     strassens_matrix = square_matrix_multiply_strassens(A, B)
+    blocked_matrix = matrix_multiply_blocked(A, B, block_size=1)
+    strassen_matrix = matrix_multiply_strassen(A, B, cutoff=1)
+    parallel_strassen_matrix = matrix_multiply_strassen_parallel(
+        A, B, cutoff=1, processes=2)
+    sparse_matrix = CSRMatrix.from_dense(numpy.triu(A)).dot(B)
     print(A)
     print(B)
     print(A.dot(B))
     print(square_matrix)
     print(strassens_matrix)
+    print(blocked_matrix)
+    print(strassen_matrix)
+    print(parallel_strassen_matrix)
+    print(numpy.triu(A).dot(B))
+    print(sparse_matrix)
 
     pass
 
 
 if __name__ == '__main__':
-    test()
+    if sys.argv[1:] == ['benchmark']:
+        print_benchmark(benchmark_matrix_multiply(save=True))
+    else:
+        test()
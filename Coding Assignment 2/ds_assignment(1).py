@@ -4,43 +4,38 @@ Open Addressed Hash Dictionary and Binary Search Tree.
 All these functions allow only unique inputs as the nodes or keys.
 Non unique nodes or keys are not added to the information sets represented by these classes.
 """
-#from decimal import Decimal
-from decimal import *
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+import functools
 import random
+import sys
+import threading
+import time
 
 
 class SinglyLinkedNode(object):
-    def __init__(self, item=None, next_link=None):
-        super(SinglyLinkedNode, self).__init__()
-        self._item = item
-        self._next = next_link
-
-    @property
-    def item(self):
-        return self._item
-
-    @item.setter
-    def item(self, item):
-        self._item = item
+    __slots__ = ('item', 'next', 'hash_code')
 
-    @property
-    def next(self):
-        return self._next
-
-    @next.setter
-    def next(self, next):
-        self._next = next
+    def __init__(self, item=None, next_link=None, hash_code=None):
+        super(SinglyLinkedNode, self).__init__()
+        self.item = item
+        self.next = next_link
+        # hash code of the key, kept by ChainedHashDict
+        self.hash_code = hash_code
 
     def __repr__(self):
         return repr(self.item)
 
 
 class SinglyLinkedList(object):
-    def __init__(self):
+    def __init__(self, unique_index=False):
         super(SinglyLinkedList, self).__init__()
         # Setting head to none to indicate the list is empty.
         self._head = None
+        self._tail = None
         self._length = 0
+        # optional set of the items making the duplicate checks O(1), the items
+        # must then be hashable
+        self._index = set() if unique_index else None
 
     def __len__(self):
         """
@@ -57,8 +52,8 @@ class SinglyLinkedList(object):
         :return: Yields item values of each node
         """
         temp_node = self._head
-        while temp_node:
-            yield str(temp_node.item)
+        while temp_node is not None:
+            yield temp_node.item
             temp_node = temp_node.next
 
     def contains_element(self, item):
@@ -67,6 +62,8 @@ class SinglyLinkedList(object):
         :param item: Value to be searched in the list
         :return: Boolean value based on the search result
         """
+        if self._index is not None:
+            return item in self._index
         for temp_node_item in self:
             if temp_node_item == item:
                 return True
@@ -74,15 +71,15 @@ class SinglyLinkedList(object):
 
     def __contains__(self, item):
         """
-        Converts the given element to string and checks if it is present
-        in the linked list using contains_element method
+        Checks if the given item is present in the linked list using
+        contains_element method
         :param item: Value to be searched in the list
         :return: Boolean value from the contains_element method
         >>> slist.prepend(10)
         >>> slist.__contains__(10)
         True
         """
-        return self.contains_element(str(item))
+        return self.contains_element(item)
 
     def getnode(self):
         """
@@ -90,10 +87,27 @@ class SinglyLinkedList(object):
         :return: Node
         """
         temp_node = self._head
-        while temp_node:
+        while temp_node is not None:
             yield temp_node
             temp_node = temp_node.next
 
+    def unlink(self, previous, node):
+        """
+        Takes a node out of the list.
+        :param previous: node before it, None for the head
+        :param node: node to take out
+        :return: None
+        """
+        if previous is None:
+            self._head = node.next
+        else:
+            previous.next = node.next
+        if node is self._tail:
+            self._tail = previous
+        self._length -= 1
+        if self._index is not None:
+            self._index.discard(node.item)
+
     def remove(self, item):
         """
         Deletes an item from the linked List if present.
@@ -103,20 +117,14 @@ class SinglyLinkedList(object):
         >>> len(slist)
         1
         """
+        if self._index is not None and item not in self._index:
+            return
         previous = None
-        found = False
         for temp_node in self.getnode():  # searches to see if item is present
             if temp_node.item == item:
-                found = True
-                break
-            else:
-                previous = temp_node  # holds previous node in case item not found
-        if found:
-            if previous is None:
-                self._head = temp_node.next
-            else:
-                previous.next = temp_node.next  # removing the item
-            self._length -= 1
+                self.unlink(previous, temp_node)
+                return
+            previous = temp_node  # holds previous node in case item not found
 
     def prepend(self, item):
         """
@@ -127,27 +135,374 @@ class SinglyLinkedList(object):
         >>> len(slist)
         2
         """
-        new_node = SinglyLinkedNode(item)
-        if not self.__contains__(item):  # check if item already present
-            if self._head is not None:
-                new_node.next = self._head
-            self._head = new_node
+        if not self.contains_element(item):  # check if item already present
+            self.push_node(SinglyLinkedNode(item))
+
+    def append(self, item):
+        """
+        Adds new item to the Linked List at the end if not already present.
+        :param item: Value to be added
+        :return: None
+        >>> items = SinglyLinkedList(unique_index=True)
+        >>> for item in (1, 2, 1, 3):
+        ...     items.append(item)
+        >>> items.prepend(0)
+        >>> list(items), 3 in items, '3' in items
+        ([0, 1, 2, 3], True, False)
+        """
+        if not self.contains_element(item):
+            node = SinglyLinkedNode(item)
+            if self._tail is None:
+                self._head = node
+            else:
+                self._tail.next = node
+            self._tail = node
             self._length += 1
+            if self._index is not None:
+                self._index.add(item)
+
+    def push_node(self, node):
+        """
+        Links an existing node in at the beginning without checking for
+        duplicates. The caller guarantees the item is not already present.
+        :param node: SinglyLinkedNode to be added
+        :return: None
+        """
+        node.next = self._head
+        self._head = node
+        if self._tail is None:
+            self._tail = node
+        self._length += 1
+        if self._index is not None:
+            self._index.add(node.item)
 
     def __repr__(self):
-        s = "List:" + "->".join([item for item in self])
+        s = "List:" + "->".join([str(item) for item in self])
+        return s
+
+
+class UnrolledNode(object):
+    __slots__ = ('items', 'next')
+
+    def __init__(self, items=None, next_link=None):
+        super(UnrolledNode, self).__init__()
+        self.items = [] if items is None else items
+        self.next = next_link
+
+    def __repr__(self):
+        return repr(self.items)
+
+
+class UnrolledLinkedList(object):
+    """
+    Linked list of unique items whose nodes each hold up to node_capacity items
+    in an array, so walking it follows one link per node_capacity items. Adding
+    at a full end starts a new node, inserting into a full node splits it in
+    two halves, and a node less than half full after a remove takes items from,
+    or merges with, the next one.
+    """
+
+    def __init__(self, node_capacity=32, unique_index=False):
+        super(UnrolledLinkedList, self).__init__()
+        assert node_capacity >= 2, "a node must hold at least two items"
+        self.node_capacity = node_capacity
+        self._head = None
+        self._tail = None
+        self._length = 0
+        self._node_count = 0
+        # optional set of the items making the duplicate checks O(1), the items
+        # must then be hashable
+        self._index = set() if unique_index else None
+
+    def __len__(self):
+        """
+        Gives the length of the Linked List
+        :return: Length
+        """
+        return self._length
+
+    @property
+    def node_count(self):
+        """
+        Gives the number of nodes holding the items.
+        :return: node count
+        >>> items = UnrolledLinkedList(node_capacity=16)
+        >>> for item in range(1000):
+        ...     items.append(item)
+        >>> len(items), items.node_count
+        (1000, 63)
+        >>> items = UnrolledLinkedList(node_capacity=16)
+        >>> for item in range(1000):
+        ...     items.insert(len(items) // 2, item)
+        >>> len(items), 63 <= items.node_count <= 125
+        (1000, True)
+        """
+        return self._node_count
+
+    def __iter__(self):
+        """
+        Loops through the content of the Linked list and yields the item values.
+        :return: Yields item values of each node
+        """
+        node = self._head
+        while node is not None:
+            for item in node.items:
+                yield item
+            node = node.next
+
+    def contains_element(self, item):
+        """
+        Checks if the given item is present in the linked list
+        :param item: Value to be searched in the list
+        :return: Boolean value based on the search result
+        """
+        if self._index is not None:
+            return item in self._index
+        node = self._head
+        while node is not None:
+            if item in node.items:
+                return True
+            node = node.next
+        return False
+
+    def __contains__(self, item):
+        """
+        Checks if the given item is present in the linked list using
+        contains_element method
+        :param item: Value to be searched in the list
+        :return: Boolean value from the contains_element method
+        """
+        return self.contains_element(item)
+
+    def split(self, node):
+        """
+        Moves the upper half of a full node into a new node linked after it.
+        :param node: node to split
+        :return: the new node
+        """
+        half = len(node.items) // 2
+        new_node = UnrolledNode(node.items[half:], node.next)
+        del node.items[half:]
+        node.next = new_node
+        if node is self._tail:
+            self._tail = new_node
+        self._node_count += 1
+        return new_node
+
+    def added(self, item):
+        """
+        Counts an item that was just added.
+        :return: None
+        """
+        self._length += 1
+        if self._index is not None:
+            self._index.add(item)
+
+    def prepend(self, item):
+        """
+        Adds new item to the Linked List at the beginning if not already present.
+        :param item: Value to be added
+        :return: None
+        >>> items = UnrolledLinkedList(node_capacity=4)
+        >>> for item in range(6):
+        ...     items.prepend(item)
+        >>> items.prepend(3)
+        >>> items, items.node_count
+        (List:5->4->3->2->1->0, 2)
+        """
+        if self.contains_element(item):
+            return
+        if self._head is None or len(self._head.items) == self.node_capacity:
+            self._head = UnrolledNode(next_link=self._head)
+            if self._tail is None:
+                self._tail = self._head
+            self._node_count += 1
+        self._head.items.insert(0, item)
+        self.added(item)
+
+    def append(self, item):
+        """
+        Adds new item to the Linked List at the end if not already present.
+        :param item: Value to be added
+        :return: None
+        """
+        if self.contains_element(item):
+            return
+        if self._tail is None:
+            self._head = self._tail = UnrolledNode()
+            self._node_count = 1
+        elif len(self._tail.items) == self.node_capacity:
+            self._tail.next = UnrolledNode()
+            self._tail = self._tail.next
+            self._node_count += 1
+        self._tail.items.append(item)
+        self.added(item)
+
+    def insert(self, position, item):
+        """
+        Adds new item before the given position if not already present,
+        splitting a full node.
+        :param position: index the item gets, clamped to the list
+        :param item: Value to be added
+        :return: None
+        >>> items = UnrolledLinkedList(node_capacity=4)
+        >>> for item in range(4):
+        ...     items.append(item)
+        >>> items.insert(2, 'x')
+        >>> [node.items for node in items.getnode()]
+        [[0, 1, 'x'], [2, 3]]
+        """
+        if self._head is None or position >= self._length:
+            self.append(item)
+            return
+        if self.contains_element(item):
+            return
+        node = self._head
+        while position > len(node.items):
+            position -= len(node.items)
+            node = node.next
+        if len(node.items) == self.node_capacity:
+            new_node = self.split(node)
+            if position > len(node.items):
+                position -= len(node.items)
+                node = new_node
+        node.items.insert(max(position, 0), item)
+        self.added(item)
+
+    def remove(self, item):
+        """
+        Deletes an item from the linked List if present, then rebalances its
+        node with the next one.
+        :param item: Value to be deleted
+        :return: None
+        >>> items = UnrolledLinkedList(node_capacity=4)
+        >>> for item in range(8):
+        ...     items.append(item)
+        >>> for item in (0, 1, 2):
+        ...     items.remove(item)
+        >>> items, [node.items for node in items.getnode()]
+        (List:3->4->5->6->7, [[3, 4], [5, 6, 7]])
+        """
+        if self._index is not None and item not in self._index:
+            return
+        previous = None
+        node = self._head
+        while node is not None:
+            if item in node.items:
+                node.items.remove(item)
+                self._length -= 1
+                if self._index is not None:
+                    self._index.discard(item)
+                self.rebalance(previous, node)
+                return
+            previous = node
+            node = node.next
+
+    def rebalance(self, previous, node):
+        """
+        Refills a node that fell below half capacity from the next node,
+        merging the two when they fit in one. An emptied node without a next
+        node is unlinked.
+        :param previous: node before it, None for the head
+        :param node: node that lost an item
+        :return: None
+        """
+        minimum = self.node_capacity // 2
+        if len(node.items) >= minimum:
+            return
+        following = node.next
+        if following is not None:
+            if len(node.items) + len(following.items) <= self.node_capacity:
+                node.items.extend(following.items)  # merge
+                self.unlink(node, following)
+            else:
+                moved = minimum - len(node.items)
+                node.items.extend(following.items[:moved])
+                del following.items[:moved]
+        elif not node.items:
+            self.unlink(previous, node)
+
+    def unlink(self, previous, node):
+        """
+        Takes a node out of the list.
+        :param previous: node before it, None for the head
+        :param node: node to take out
+        :return: None
+        """
+        if previous is None:
+            self._head = node.next
+        else:
+            previous.next = node.next
+        if node is self._tail:
+            self._tail = previous
+        self._node_count -= 1
+
+    def getnode(self):
+        """
+        Loops through the list to yields the nodes.
+        :return: Node
+        """
+        node = self._head
+        while node is not None:
+            yield node
+            node = node.next
+
+    def __repr__(self):
+        s = "List:" + "->".join([str(item) for item in self])
         return s
 
 
 class ChainedHashDict(object):
-    def __init__(self, bin_count=10, max_load=0.7, hashfunc=hash):
+    def __init__(self, bin_count=10, max_load=0.7, hashfunc=None,
+                 incremental=False, rehash_step=4):
         super(ChainedHashDict, self).__init__()
         # Construct a new table
         self.max_bin_capacity = bin_count
         self.max_load_factor = max_load
+        # None: bins come from the cached strong_hash of the key
         self.hashing_func = hashfunc
         self.length = 0
         self.hash_array = [None]*bin_count
+        self.resize_threshold = self.threshold_for(bin_count)
+        # incremental resizing: each insert and delete moves over at least
+        # rehash_step old bins, more when that would not finish the migration
+        # before the next resize
+        self.incremental = incremental
+        self.rehash_step = rehash_step
+        self.migrate_step = rehash_step
+        # bins still being migrated, None when no resize is in progress
+        self.old_hash_array = None
+        self.migrate_index = 0  # next old bin to migrate
+        self.rebuild_count = 0
+        # time spent in rebuilds, a resize migrating incrementally only counts
+        # its start
+        self.rebuild_seconds = 0.0
+
+    def threshold_for(self, bincount):
+        """
+        Gives the number of items at which a table of the given size reaches
+        the maximum load factor, so inserts compare integers instead of
+        dividing Decimals.
+        :param bincount: bin size
+        :return: smallest length with length / bincount >= max_load_factor
+        >>> ChainedHashDict(10, 0.7).threshold_for(30)
+        21
+        """
+        threshold = Decimal(self.max_load_factor) * bincount
+        return int(threshold.to_integral_value(rounding=ROUND_CEILING))
+
+    def bin_index(self, key, hash_code, bincount):
+        """
+        Gives the bin of a key, from its stored hash code unless a hash
+        function was given.
+        :param key: key to place
+        :param hash_code: strong_hash(key)
+        :param bincount: bin size
+        :return: Hash index
+        """
+        if self.hashing_func is None:
+            return hash_code % bincount
+        return self.hashing_func(key, bincount)
 
     @property
     def load_factor(self):
@@ -198,22 +553,253 @@ class ChainedHashDict(object):
         18:None
         19:None
         """
-        self.length = 0
+        started = time.time()
+        self.finish_migration()
         temp_hash_array = [None]*bincount  # create a temporary array that will be of new bin size.
-        for i in range(self.bin_count):
-            sll1 = self.hash_array[i]
+        for sll1 in self.hash_array:
             if sll1 is not None:
-                for list_node in sll1.getnode():
-                    new_hash_index = self.hashing_func(list_node.item[0], bincount)
-                    sll2 = SinglyLinkedList()
-                    if temp_hash_array[new_hash_index] is not None:
-                        sll2 = temp_hash_array[new_hash_index]
-                    sll2.prepend(list_node.item)
-                    temp_hash_array[new_hash_index] = sll2  # moving nodes to the temporary hash array
-                    self.length += 1
-        self.hash_array = []
-        self.hash_array = list(temp_hash_array)  # populating the hash array with new arrangement.
+                self.relink_chain(sll1, temp_hash_array, bincount)
+        # populating the hash array with new arrangement.
+        self.hash_array = temp_hash_array
         self.max_bin_capacity = bincount
+        self.resize_threshold = self.threshold_for(bincount)
+        self.record_rebuild(started)
+
+    def record_rebuild(self, started):
+        """
+        Counts a rebuild that began at the given time.
+        :param started: time.time() when the rebuild began
+        :return: None
+        """
+        self.rebuild_count += 1
+        self.rebuild_seconds += time.time() - started
+
+    @property
+    def table_stats(self):
+        """
+        Gives the shape of the table: a histogram of chain lengths, the longest
+        chain, the average number of nodes a search for a present key visits
+        and the rebuilds so far.
+        :return: dictionary with bins, histogram, longest, average_probes,
+            rebuilds and rebuild_seconds
+        >>> table = ChainedHashDict(4, 1.0, chaining_hash_func)
+        >>> for key in (0, 4, 8, 1):
+        ...     table[key] = key
+        >>> stats = table.table_stats
+        >>> (stats['histogram'], stats['longest'], stats['average_probes'],
+        ...  stats['rebuilds'])
+        ([2, 1, 0, 1], 3, 1.75, 0)
+        """
+        histogram = [0]
+        arrays = [self.hash_array]
+        if self.old_hash_array is not None:
+            arrays.append(self.old_hash_array)
+        for hash_array in arrays:
+            for sll in hash_array:
+                chain_length = 0 if sll is None else len(sll)
+                if chain_length >= len(histogram):
+                    histogram.extend([0]*(chain_length + 1 - len(histogram)))
+                histogram[chain_length] += 1
+        # a search for the k-th node of a chain visits k nodes
+        probes = sum(count * chain_length * (chain_length + 1) // 2
+                     for chain_length, count in enumerate(histogram))
+        return {'bins': self.bin_count,
+                'histogram': histogram,
+                'longest': len(histogram) - 1,
+                'average_probes':
+                    float(probes) / self.length if self.length else 0.0,
+                'rebuilds': self.rebuild_count,
+                'rebuild_seconds': self.rebuild_seconds}
+
+    def relink_chain(self, sll, hash_array, bincount):
+        """
+        Moves every node of a chain into the bins of the given array.
+        :param sll: chain to empty
+        :param hash_array: bins receiving the nodes
+        :param bincount: size of hash_array
+        :return: None
+        """
+        list_node = sll._head
+        while list_node is not None:
+            next_node = list_node.next
+            new_hash_index = self.bin_index(list_node.item[0],
+                                            list_node.hash_code, bincount)
+            sll2 = hash_array[new_hash_index]
+            if sll2 is None:
+                sll2 = hash_array[new_hash_index] = SinglyLinkedList()
+            # relinking the node, keys are already unique
+            sll2.push_node(list_node)
+            list_node = next_node
+
+    def start_migration(self, bincount):
+        """
+        Swaps in an empty array of the new bin size and keeps the current bins
+        for migrate to move over.
+        :param bincount: New Bin size
+        :return: None
+        """
+        started = time.time()
+        self.finish_migration()
+        self.old_hash_array = self.hash_array
+        self.migrate_index = 0
+        self.hash_array = [None]*bincount
+        self.max_bin_capacity = bincount
+        self.resize_threshold = self.threshold_for(bincount)
+        self.migrate_step = migration_step(
+            len(self.old_hash_array), self.resize_threshold - self.length,
+            self.rehash_step)
+        self.record_rebuild(started)
+
+    def migrate(self, steps):
+        """
+        Moves the chains of up to the given number of old bins into the current
+        bins.
+        :param steps: number of old bins to migrate
+        :return: None
+        >>> table = ChainedHashDict(4, 0.5, chaining_hash_func,
+        ...                         incremental=True, rehash_step=1)
+        >>> for key in range(3):
+        ...     table[key] = key
+        >>> table.bin_count, len(table.old_hash_array), table.migrate_index
+        (8, 4, 0)
+        >>> table.migrate(10)
+        >>> table.old_hash_array is None, table[1]
+        (True, 1)
+        """
+        old_hash_array = self.old_hash_array
+        if old_hash_array is None:
+            return
+        start = self.migrate_index
+        stop = min(start + steps, len(old_hash_array))
+        for i in range(start, stop):
+            sll = old_hash_array[i]
+            if sll is not None:
+                self.relink_chain(sll, self.hash_array, self.bin_count)
+                old_hash_array[i] = None
+        self.migrate_index = stop
+        if stop == len(old_hash_array):
+            self.old_hash_array = None
+
+    def finish_migration(self):
+        """
+        Completes a resize in progress.
+        :return: None
+        """
+        if self.old_hash_array is not None:
+            self.migrate(len(self.old_hash_array))
+
+    def search_chain(self, sll, key, hash_code):
+        """
+        Walks a chain looking for the key, comparing hash codes before keys.
+        :return: (node before the key's node, node holding the key or None)
+        """
+        previous = None
+        if sll is not None:
+            for node in sll.getnode():
+                if node.hash_code == hash_code and node.item[0] == key:
+                    return (previous, node)
+                previous = node
+        return (None, None)
+
+    def locate(self, key, hash_code):
+        """
+        Walks the chain of the key once, and the key's old chain as well while
+        a resize is migrating.
+        :param key: key to be searched
+        :param hash_code: strong_hash(key)
+        :return: (chain, node before the key's node, node holding the key),
+            node is None if the key is absent
+        """
+        sll = self.hash_array[self.bin_index(key, hash_code, self.bin_count)]
+        previous, node = self.search_chain(sll, key, hash_code)
+        old_hash_array = self.old_hash_array
+        if node is None and old_hash_array is not None:
+            old_index = self.bin_index(key, hash_code, len(old_hash_array))
+            sll = old_hash_array[old_index]
+            previous, node = self.search_chain(sll, key, hash_code)
+        return (sll, previous, node)
+
+    def find_node(self, key):
+        """
+        Finds the node of a key.
+        :param key: key to be searched
+        :return: node holding the key, value pair or None
+        """
+        return self.locate(key, strong_hash(key))[2]
+
+    def bins_for(self, count):
+        """
+        Gives the smallest bin size holding the given number of items without
+        reaching the resize threshold.
+        :param count: number of items
+        :return: bin size
+        >>> ChainedHashDict(10, 0.7).bins_for(1000)
+        1428
+        """
+        bins = Decimal(count) / Decimal(self.max_load_factor)
+        bincount = max(1, int(bins.to_integral_value(rounding=ROUND_FLOOR)))
+        while self.threshold_for(bincount) < count:
+            bincount += 1
+        return bincount
+
+    @classmethod
+    def from_items(cls, items, expected_size=None, unique_keys=False,
+                   **kwargs):
+        """
+        Builds a table sized once for the given key, value pairs.
+        :param items: mapping or iterable of (key, value) pairs
+        :param expected_size: number of pairs, taken from len(items) when not
+            given
+        :param unique_keys: the caller guarantees the keys do not repeat
+        :param kwargs: constructor arguments (bin_count, max_load, hashfunc,
+            ...)
+        :return: ChainedHashDict
+        >>> table = ChainedHashDict.from_items(('k%d' % i, i)
+        ...                                    for i in range(100))
+        >>> len(table), table.bin_count, table['k42']
+        (100, 142, 42)
+        """
+        table = cls(**kwargs)
+        table.update(items, expected_size, unique_keys)
+        return table
+
+    def update(self, items, expected_size=None, unique_keys=False):
+        """
+        Inserts many key, value pairs, resizing the table once up front instead
+        of rebuilding as it fills. Values of keys already present are replaced,
+        as with __setitem__.
+        :param items: mapping or iterable of (key, value) pairs
+        :param expected_size: number of pairs, taken from len(items) when not
+            given
+        :param unique_keys: the caller guarantees the keys neither repeat nor
+            are present, so chains are not walked
+        :return: None
+        >>> table = ChainedHashDict(2, 0.7)
+        >>> table.update([('a', 1), ('b', 2), ('a', 3)])
+        >>> table.bin_count, len(table), table['a']
+        (4, 2, 3)
+        """
+        items, expected_size = sized_items(items, expected_size)
+        self.finish_migration()
+        if self.length + expected_size > self.resize_threshold:
+            self.rebuild(self.bins_for(self.length + expected_size))
+        hash_array = self.hash_array
+        bincount = self.bin_count
+        for key, value in items:
+            hash_code = strong_hash(key)
+            hash_index = self.bin_index(key, hash_code, bincount)
+            sll = hash_array[hash_index]
+            if sll is None:
+                sll = hash_array[hash_index] = SinglyLinkedList()
+            elif not unique_keys:
+                node = self.search_chain(sll, key, hash_code)[1]
+                if node is not None:
+                    node.item = (key, value)
+                    continue
+            sll.push_node(SinglyLinkedNode((key, value), hash_code=hash_code))
+            self.length += 1
+        if self.length > self.resize_threshold:  # more pairs than expected
+            self.rebuild(self.bins_for(self.length))
 
     def __getitem__(self, key):
         """
@@ -224,17 +810,17 @@ class ChainedHashDict(object):
         >>> chained[0]
         10
         """
-        hash_index = self.hashing_func(key, self.bin_count)
-        sll = self.hash_array[hash_index]
-        if sll is not None:
-            for node in sll.getnode():
-                return node.item[1]
+        node = self.find_node(key)
+        if node is not None:
+            return node.item[1]
         else:
             return "Value not present."
 
     def __setitem__(self, key, value):
         """
-        Inserting the given key, value pair into the hash array
+        Inserting the given key, value pair into the hash array, or updating
+        the value if the key is already present, with a single walk of the
+        chain.
         :param key: key to a particular value
         :param value: the actual value
         :return: None
@@ -242,17 +828,27 @@ class ChainedHashDict(object):
         >>> print chained[10]
         20
         """
-        if not self.__contains__(key):
-            if self.load_factor >= self.max_load_factor:  # if load factor greater than maximum load factor
+        if self.old_hash_array is not None:
+            self.migrate(self.migrate_step)
+        hash_code = strong_hash(key)
+        node = self.locate(key, hash_code)[2]
+        if node is not None:
+            node.item = (key, value)
+            return
+        # if load factor reached maximum load factor
+        if self.length >= self.resize_threshold:
+            if self.incremental:
+                # old bins move over during the next operations
+                self.start_migration(self.bin_count*2)
+            else:
                 self.rebuild(self.bin_count*2)  # Rebuilding the hash array
-            hash_index = self.hashing_func(key, self.bin_count)  # evaluating hash index
-            sll = self.hash_array[hash_index]
-            if sll is None:
-                sll = SinglyLinkedList()
-            tup = (key, value)
-            sll.prepend(tup)
-            self.hash_array[hash_index] = sll
-            self.length += 1
+        # evaluating hash index
+        hash_index = self.bin_index(key, hash_code, self.bin_count)
+        sll = self.hash_array[hash_index]
+        if sll is None:
+            sll = self.hash_array[hash_index] = SinglyLinkedList()
+        sll.push_node(SinglyLinkedNode((key, value), hash_code=hash_code))
+        self.length += 1
 
     def __delitem__(self, key):
         """
@@ -263,22 +859,11 @@ class ChainedHashDict(object):
         >>> print chained[10]
         Value not present.
         """
-        hash_index = self.hashing_func(key, self.bin_count)
-        sll = self.hash_array[hash_index]
-        if sll is not None:
-            found = False
-            previous = None
-            for temp_node in sll.getnode():
-                if temp_node.item[0] == key:
-                    found = True
-                    break
-                else:
-                    previous = temp_node
-            if found:
-                if previous is None:
-                    sll._head = temp_node.next
-                else:
-                    previous.next = temp_node.next
+        if self.old_hash_array is not None:
+            self.migrate(self.migrate_step)
+        sll, previous, temp_node = self.locate(key, strong_hash(key))
+        if temp_node is not None:
+            sll.unlink(previous, temp_node)
             self.length -= 1
 
     def __contains__(self, key):
@@ -290,15 +875,7 @@ class ChainedHashDict(object):
         >>> chained[2]
         10
         """
-        hash_index = self.hashing_func(key, self.bin_count)
-        sll = self.hash_array[hash_index]
-        if sll is None:
-            return False
-        else:
-            for node in sll.getnode():
-                if node.item[0] == key:
-                    return True
-            return False
+        return self.find_node(key) is not None
 
     def __len__(self):
         """
@@ -315,13 +892,14 @@ class ChainedHashDict(object):
         and also items in each bin
         :return: Complete Hash table
         """
+        self.finish_migration()
         string_list = None
         for i in range(self.bin_count):
             sll = self.hash_array[i]
             if sll is None:
                 s = str(i) + ':' + str('None')
             else:
-                s = str(i) + ':' + "->".join([item for item in sll])
+                s = str(i) + ':' + "->".join([str(item) for item in sll])
             if string_list is None:
                 string_list = s
             else:
@@ -330,15 +908,235 @@ class ChainedHashDict(object):
         return string_list
 
 
+class ConcurrentChainedHashDict(ChainedHashDict):
+    """
+    ChainedHashDict that worker threads can share. Writers lock the stripe
+    covering the range of bins the key falls in, readers take no lock: they
+    work on a snapshot of (bins, bin count) published in one assignment, and a
+    chain is only ever changed by single reference assignments, so a reader
+    sees each insert or delete either whole or not at all. A resize takes every
+    stripe, copies the nodes into new bins and publishes them, leaving the old
+    bins untouched for the readers still walking them.
+    """
+
+    def __init__(self, bin_count=10, max_load=0.7, hashfunc=None,
+                 stripe_count=16):
+        super(ConcurrentChainedHashDict, self).__init__(bin_count, max_load,
+                                                        hashfunc)
+        self.stripe_count = stripe_count
+        self.stripes = [threading.Lock() for i in range(stripe_count)]
+        self.length_lock = threading.Lock()
+        # what readers see, replaced whole by a resize
+        self.state = (self.hash_array, bin_count)
+
+    def stripe_for(self, hash_index, bincount):
+        """
+        Gives the lock guarding a bin, stripes cover equal ranges of bins.
+        :param hash_index: bin
+        :param bincount: bin size the bin belongs to
+        :return: Lock
+        """
+        return self.stripes[hash_index * self.stripe_count // bincount]
+
+    def rebuild(self, bincount):
+        """
+        Moves the contents into copies of the nodes in the given number of bins
+        while holding every stripe.
+        :param bincount: New Bin size
+        :return: None
+        """
+        for lock in self.stripes:
+            lock.acquire()
+        try:
+            self.publish(bincount)
+        finally:
+            for lock in reversed(self.stripes):
+                lock.release()
+
+    def grow(self, bincount):
+        """
+        Doubles the bins unless another thread resized them since the caller
+        saw bincount bins.
+        :param bincount: bin size seen by the caller
+        :return: None
+        """
+        for lock in self.stripes:
+            lock.acquire()
+        try:
+            if self.state[1] == bincount:
+                self.publish(bincount*2)
+        finally:
+            for lock in reversed(self.stripes):
+                lock.release()
+
+    def publish(self, bincount):
+        """
+        Copies the nodes into new bins and makes them visible to readers; the
+        caller holds every stripe.
+        :param bincount: New Bin size
+        :return: None
+        """
+        started = time.time()
+        temp_hash_array = [None]*bincount
+        for sll1 in self.state[0]:
+            if sll1 is not None:
+                for node in sll1.getnode():
+                    new_hash_index = self.bin_index(node.item[0],
+                                                    node.hash_code, bincount)
+                    sll2 = temp_hash_array[new_hash_index]
+                    if sll2 is None:
+                        sll2 = SinglyLinkedList()
+                        temp_hash_array[new_hash_index] = sll2
+                    sll2.push_node(SinglyLinkedNode(node.item,
+                                                    hash_code=node.hash_code))
+        self.state = (temp_hash_array, bincount)
+        self.hash_array = temp_hash_array
+        self.max_bin_capacity = bincount
+        self.resize_threshold = self.threshold_for(bincount)
+        self.record_rebuild(started)
+
+    def find_node(self, key):
+        """
+        Finds the node of a key without locking.
+        :param key: key to be searched
+        :return: node holding the key, value pair or None
+        """
+        hash_code = strong_hash(key)
+        hash_array, bincount = self.state
+        sll = hash_array[self.bin_index(key, hash_code, bincount)]
+        return self.search_chain(sll, key, hash_code)[1]
+
+    def __setitem__(self, key, value):
+        """
+        Inserting the given key, value pair, or updating the value if the key
+        is already present.
+        :param key: key to a particular value
+        :param value: the actual value
+        :return: None
+        >>> table = ConcurrentChainedHashDict(4, 0.5, stripe_count=2)
+        >>> for key in 'abcde':
+        ...     table[key] = key.upper()
+        >>> table['e'] = 'E2'
+        >>> len(table), table.bin_count, table['c'], table['e']
+        (5, 16, 'C', 'E2')
+        """
+        hash_code = strong_hash(key)
+        while True:
+            hash_array, bincount = self.state
+            hash_index = self.bin_index(key, hash_code, bincount)
+            with self.stripe_for(hash_index, bincount):
+                if self.state[0] is not hash_array:
+                    continue  # resized meanwhile, retry on the new bins
+                sll = hash_array[hash_index]
+                node = self.search_chain(sll, key, hash_code)[1]
+                if node is not None:
+                    node.item = (key, value)
+                    return
+                if self.length < self.resize_threshold:
+                    if sll is None:
+                        sll = hash_array[hash_index] = SinglyLinkedList()
+                    sll.push_node(SinglyLinkedNode((key, value),
+                                                   hash_code=hash_code))
+                    with self.length_lock:
+                        self.length += 1
+                    return
+            self.grow(bincount)  # outside the stripe, grow takes all of them
+
+    def __delitem__(self, key):
+        """
+        Deletes key,value pair from the hash array
+        :param key: key to identify key,value pair to be deleted
+        :return: None
+        >>> table = ConcurrentChainedHashDict()
+        >>> table['a'] = 1
+        >>> del table['a']
+        >>> 'a' in table, len(table)
+        (False, 0)
+        """
+        hash_code = strong_hash(key)
+        while True:
+            hash_array, bincount = self.state
+            hash_index = self.bin_index(key, hash_code, bincount)
+            with self.stripe_for(hash_index, bincount):
+                if self.state[0] is not hash_array:
+                    continue
+                sll = hash_array[hash_index]
+                previous, node = self.search_chain(sll, key, hash_code)
+                if node is not None:
+                    sll.unlink(previous, node)
+                    with self.length_lock:
+                        self.length -= 1
+                return
+
+    def update(self, items, expected_size=None, unique_keys=False):
+        """
+        Inserts many key, value pairs, resizing the table once up front.
+        :param items: mapping or iterable of (key, value) pairs
+        :param expected_size: number of pairs, taken from len(items) when not
+            given
+        :param unique_keys: accepted for compatibility, every key is still
+            searched
+        :return: None
+        """
+        items, expected_size = sized_items(items, expected_size)
+        if self.length + expected_size > self.resize_threshold:
+            self.rebuild(self.bins_for(self.length + expected_size))
+        for key, value in items:
+            self[key] = value
+
+
+# States of the bins of OpenAddressHashDict
+EMPTY = 0
+OCCUPIED = 1
+# tombstone: the bin is free but probe sequences keep running through it
+DELETED = 2
+
+
 class OpenAddressHashDict(object):
-    def __init__(self, bin_count=10, max_load=0.7, hashfunc=hash):
+    # doublings a rebuild may add before giving up on placing every key within
+    # max_probes
+    max_rebuild_growth = 8
+
+    def __init__(self, bin_count=10, max_load=0.7, hashfunc=None,
+                 max_probes=None, incremental=False, rehash_step=4):
         super(OpenAddressHashDict, self).__init__()
         # initialize
         self.max_bin_capacity = bin_count
         self.max_load_factor = max_load
+        # None: linear probing from the cached strong_hash of the key
         self.hashing_func = hashfunc
+        # None: a probe sequence may visit every bin
+        self.max_probes = max_probes
         self.length = 0
-        self.hash_array = [None]*bin_count
+        self.allocate(bin_count)
+        self.reset_probe_stats()
+        # incremental resizing: each insert and delete moves over at least
+        # rehash_step old bins, more when that would not finish the migration
+        # before the next resize
+        self.incremental = incremental
+        self.rehash_step = rehash_step
+        self.migrate_step = rehash_step
+        # (hashes, keys, values, states) still being migrated, None when not
+        # resizing
+        self.old_slots = None
+        self.migrate_index = 0  # next old bin to migrate
+        self.rebuild_count = 0
+        # time spent in rebuilds, a resize migrating incrementally only counts
+        # its start
+        self.rebuild_seconds = 0.0
+
+    def allocate(self, bincount):
+        """
+        Creates empty parallel arrays for the bins: hash code, key, value and a
+        state byte per bin.
+        :param bincount: number of bins
+        :return: None
+        """
+        self.slot_hashes = [None]*bincount
+        self.slot_keys = [None]*bincount
+        self.slot_values = [None]*bincount
+        self.slot_states = bytearray(bincount)
+        self.tombstone_count = 0
 
     @property
     def load_factor(self):
@@ -360,20 +1158,173 @@ class OpenAddressHashDict(object):
         """
         return self.max_bin_capacity
 
-    def get_hash_key(self, hash_array, key, probe_count, bincount):
+    def probe_limit(self, bincount):
         """
-        Evaluates the appropriate hash index of the given key
-        :param hash_array: hash table which consists of all the key, value pairs
-        :param key: key to identify the key, value pair
-        :param probe_count: to increment probe count when searching for appropriate hash index
+        Gives the number of probes an operation may make on a table of the
+        given size.
+        :param bincount: capacity of the hash table
+        :return: probe bound
+        """
+        if self.max_probes is None:
+            return bincount
+        return min(self.max_probes, bincount)
+
+    def reset_probe_stats(self):
+        """
+        Clears the probe length counters.
+        :return: None
+        """
+        # probe_histogram[n] is the number of searches that took n probes
+        self.probe_histogram = []
+
+    def record_probes(self, probes):
+        """
+        Counts one search that took the given number of probes.
+        :param probes: probe length of the search
+        :return: None
+        """
+        histogram = self.probe_histogram
+        if probes >= len(histogram):
+            histogram.extend([0]*(probes + 1 - len(histogram)))
+        histogram[probes] += 1
+
+    @property
+    def probe_stats(self):
+        """
+        Gives the probe lengths of the searches made since the last
+        reset_probe_stats.
+        :return: dictionary with searches, total, average and longest probes
+            and the histogram
+        >>> table = OpenAddressHashDict(10, 0.9, open_addressing_hash_func)
+        >>> for key in (0, 10, 20):
+        ...     table[key] = key
+        >>> table.reset_probe_stats()
+        >>> table[20]
+        20
+        >>> stats = table.probe_stats
+        >>> stats['searches'], stats['longest'], stats['histogram']
+        (1, 3, [0, 0, 0, 1])
+        """
+        histogram = self.probe_histogram
+        searches = sum(histogram)
+        total = sum(probes * count for probes, count in enumerate(histogram))
+        return {'searches': searches,
+                'total': total,
+                'average': float(total) / searches if searches else 0.0,
+                'longest': len(histogram) - 1 if histogram else 0,
+                'histogram': list(histogram)}
+
+    def slot_index(self, key, hash_code, probe_count, bincount):
+        """
+        Gives the bin visited by a probe, from the stored hash code unless a
+        hash function was given.
+        :param key: key being probed for
+        :param hash_code: strong_hash(key)
+        :param probe_count: probe number
         :param bincount: capacity of the hash table
         :return: Hash index
         """
-        hash_index = self.hashing_func(key, probe_count, bincount)
-        if hash_array[hash_index] is not None:
+        if self.hashing_func is None:
+            return (hash_code + probe_count) % bincount
+        return self.hashing_func(key, probe_count, bincount)
+
+    def record_rebuild(self, started):
+        """
+        Counts a rebuild that began at the given time.
+        :param started: time.time() when the rebuild began
+        :return: None
+        """
+        self.rebuild_count += 1
+        self.rebuild_seconds += time.time() - started
+
+    @property
+    def table_stats(self):
+        """
+        Gives the probe lengths of the searches since the last
+        reset_probe_stats, the tombstones and the rebuilds so far.
+        :return: dictionary with bins, histogram, longest, average_probes,
+            tombstones, rebuilds and rebuild_seconds
+        >>> table = OpenAddressHashDict(2, 0.5, open_addressing_hash_func)
+        >>> for key in range(4):
+        ...     table[key] = key
+        >>> stats = table.table_stats
+        >>> stats['bins'], stats['rebuilds'], stats['longest']
+        (8, 2, 1)
+        """
+        probe_stats = self.probe_stats
+        return {'bins': self.bin_count,
+                'histogram': probe_stats['histogram'],
+                'longest': probe_stats['longest'],
+                'average_probes': probe_stats['average'],
+                'tombstones': self.tombstone_count,
+                'rebuilds': self.rebuild_count,
+                'rebuild_seconds': self.rebuild_seconds}
+
+    def get_hash_key(self, slot_states, key, hash_code, probe_count, bincount):
+        """
+        Evaluates the first free bin (empty or deleted) on the probe sequence
+        of the given key
+        :param slot_states: state array of the hash table the key goes into
+        :param key: key to identify the key, value pair
+        :param hash_code: strong_hash(key)
+        :param probe_count: probe to start searching from
+        :param bincount: capacity of the hash table
+        :return: Hash index or None when no free bin is found within the probe
+            limit
+        """
+        limit = self.probe_limit(bincount)
+        while probe_count < limit:
+            hash_index = self.slot_index(key, hash_code, probe_count, bincount)
+            if slot_states[hash_index] != OCCUPIED:
+                return hash_index
+            probe_count += 1
+        return None
+
+    def probe(self, key, hash_code):
+        """
+        Walks the probe sequence of the key in the current bins.
+        :param key: key to be searched
+        :param hash_code: strong_hash(key)
+        :return: (bin holding the key or None, first free bin seen or None)
+        """
+        return self.probe_slots(self.slot_hashes, self.slot_keys,
+                                self.slot_states, key, hash_code)
+
+    def probe_slots(self, slot_hashes, slot_keys, slot_states, key, hash_code):
+        """
+        Walks the probe sequence of the key in the given bins up to the first
+        empty bin, at most probe_limit bins. Hash codes are compared before
+        keys, deleted bins are passed over.
+        :param slot_hashes: hash code array of the bins
+        :param slot_keys: key array of the bins
+        :param slot_states: state array of the bins
+        :param key: key to be searched
+        :param hash_code: strong_hash(key)
+        :return: (bin holding the key or None, first free bin seen or None)
+        """
+        slot_index = self.slot_index
+        bincount = len(slot_states)
+        limit = self.probe_limit(bincount)
+        found_index = None
+        free_index = None
+        probe_count = 0
+        while probe_count < limit:
+            hash_index = slot_index(key, hash_code, probe_count, bincount)
             probe_count += 1
-            hash_index = self.get_hash_key(hash_array, key, probe_count, bincount)
-        return hash_index
+            state = slot_states[hash_index]
+            if state == EMPTY:
+                if free_index is None:
+                    free_index = hash_index
+                break
+            if state == DELETED:
+                if free_index is None:
+                    free_index = hash_index
+            elif (slot_hashes[hash_index] == hash_code and
+                  slot_keys[hash_index] == key):
+                found_index = hash_index
+                break
+        self.record_probes(probe_count)
+        return (found_index, free_index)
 
     def rebuild(self, bincount):
         """
@@ -404,39 +1355,178 @@ class OpenAddressHashDict(object):
         18:None
         19:None
         """
-        # Rebuild this hash table with a new bin count
-        self.length = 0
-        temp_hash_array = [None]*bincount
-        for i in range(self.bin_count):
-            sll1 = self.hash_array[i]
-            if sll1 is not None:
-                for list_node in sll1.getnode():
-                    new_hash_index = self.get_hash_key(temp_hash_array, list_node.item[0], 0, bincount)
-                    sll2 = SinglyLinkedList()
-                    sll2.prepend(list_node.item)
-                    temp_hash_array[new_hash_index] = sll2
-                    self.length += 1
-        self.hash_array = []
-        self.hash_array = list(temp_hash_array)
+        # Rebuild this hash table with a new bin count, dropping the tombstones
+        # and folding in the old bins of a resize still migrating
+        started = time.time()
+        saved = self.snapshot()
+        tables = [(self.slot_hashes, self.slot_keys, self.slot_values,
+                   self.slot_states)]
+        if self.old_slots is not None:
+            tables.append(self.old_slots)
+            self.old_slots = None
+        for growth in range(self.max_rebuild_growth + 1):
+            if self.place_all(tables, bincount):
+                self.record_rebuild(started)
+                return
+            if not self.growth_can_help(bincount):
+                break
+            # some key found no free bin within max_probes, spread the keys
+            # wider
+            bincount *= 2
+        limit = self.probe_limit(bincount)
+        self.restore(saved)
+        raise RuntimeError(
+            "hash function cannot place the keys within %d probes" % limit)
+
+    def snapshot(self):
+        """
+        Captures the arrays and counters a failed resize has to put back.
+        :return: state for restore
+        """
+        return (self.slot_hashes, self.slot_keys, self.slot_values,
+                self.slot_states, self.tombstone_count, self.max_bin_capacity,
+                self.old_slots, self.migrate_index)
+
+    def restore(self, state):
+        """
+        Puts back the arrays and counters captured by snapshot.
+        :param state: value returned by snapshot
+        :return: None
+        """
+        (self.slot_hashes, self.slot_keys, self.slot_values,
+         self.slot_states, self.tombstone_count, self.max_bin_capacity,
+         self.old_slots, self.migrate_index) = state
+
+    def growth_can_help(self, bincount):
+        """
+        Tells whether more bins may let a key that found no free bin be placed.
+        Without a max_probes below the bin count the whole probe sequence was
+        walked, so the hash function never reaches the free bins and growing
+        would only allocate memory.
+        :param bincount: capacity the key could not be placed in
+        :return: Boolean value
+        """
+        return self.probe_limit(bincount) < bincount
+
+    def place_all(self, tables, bincount):
+        """
+        Moves every occupied bin of the given (hashes, keys, values, states)
+        arrays into new arrays of the given size.
+        :return: False, leaving the table empty, if a key finds no free bin
+            within the probe limit
+        """
+        self.allocate(bincount)
+        self.max_bin_capacity = bincount
+        for hashes, keys, values, states in tables:
+            for i in range(len(states)):
+                if states[i] == OCCUPIED:
+                    new_hash_index = self.get_hash_key(
+                        self.slot_states, keys[i], hashes[i], 0, bincount)
+                    if new_hash_index is None:
+                        return False
+                    self.slot_hashes[new_hash_index] = hashes[i]
+                    self.slot_keys[new_hash_index] = keys[i]
+                    self.slot_values[new_hash_index] = values[i]
+                    self.slot_states[new_hash_index] = OCCUPIED
+        return True
+
+    def start_migration(self, bincount):
+        """
+        Swaps in empty bins of the new size and keeps the current bins for
+        migrate to move over.
+        :param bincount: new bin size
+        :return: None
+        """
+        started = time.time()
+        self.finish_migration()
+        self.old_slots = (self.slot_hashes, self.slot_keys, self.slot_values,
+                          self.slot_states)
+        self.migrate_index = 0
+        self.allocate(bincount)
         self.max_bin_capacity = bincount
+        threshold = Decimal(self.max_load_factor) * bincount
+        threshold = int(threshold.to_integral_value(rounding=ROUND_CEILING))
+        self.migrate_step = migration_step(
+            len(self.old_slots[3]), threshold - self.length, self.rehash_step)
+        self.record_rebuild(started)
+
+    def migrate(self, steps):
+        """
+        Moves the keys of up to the given number of old bins into the current
+        bins. Migrated old bins become tombstones so the probe sequences of the
+        keys not moved yet stay intact. If a key finds no free bin within the
+        probe limit the resize is completed by a full rebuild.
+        :param steps: number of old bins to migrate
+        :return: None
+        >>> table = OpenAddressHashDict(4, 0.5, open_addressing_hash_func,
+        ...                             incremental=True, rehash_step=1)
+        >>> for key in range(3):
+        ...     table[key] = key
+        >>> table.bin_count, len(table.old_slots[3]), table.migrate_index
+        (8, 4, 0)
+        >>> table.migrate(10)
+        >>> table.old_slots is None, table[1]
+        (True, 1)
+        """
+        old_slots = self.old_slots
+        if old_slots is None:
+            return
+        hashes, keys, values, states = old_slots
+        stop = min(self.migrate_index + steps, len(states))
+        for i in range(self.migrate_index, stop):
+            if states[i] == OCCUPIED:
+                new_hash_index = self.get_hash_key(
+                    self.slot_states, keys[i], hashes[i], 0, self.bin_count)
+                if new_hash_index is None:
+                    self.rebuild(self.bin_count*2)
+                    return
+                self.store(new_hash_index, hashes[i], keys[i], values[i])
+                hashes[i] = keys[i] = values[i] = None
+                states[i] = DELETED
+        self.migrate_index = stop
+        if stop == len(states):
+            self.old_slots = None
+
+    def finish_migration(self):
+        """
+        Completes a resize in progress.
+        :return: None
+        """
+        if self.old_slots is not None:
+            self.migrate(len(self.old_slots[3]))
+
+    def store(self, hash_index, hash_code, key, value):
+        """
+        Fills a free bin of the current bins.
+        :return: None
+        """
+        if self.slot_states[hash_index] == DELETED:
+            self.tombstone_count -= 1
+        self.slot_hashes[hash_index] = hash_code
+        self.slot_keys[hash_index] = key
+        self.slot_values[hash_index] = value
+        self.slot_states[hash_index] = OCCUPIED
 
-    def search(self, key, probe_count):
+    def search(self, key, probe_count=0):
         """
         Search to see if given key in present in the hash table.
-        :param key: key to be searches
-        :param probe_count: to keep track of no. of probes when searching for appropriate hash index
-        :return: Key,Value node
+        :param key: key to be searched
+        :param probe_count: unused, kept for compatibility
+        :return: bin holding the key or None
         """
-        hash_index = self.hashing_func(key, probe_count, self.bin_count)
-        sll = self.hash_array[hash_index]
-        if sll is None:
+        return self.probe(key, strong_hash(key))[0]
+
+    def search_old(self, key):
+        """
+        Search the old bins of a resize in progress for the given key.
+        :param key: key to be searched
+        :return: old bin holding the key or None
+        """
+        old_slots = self.old_slots
+        if old_slots is None:
             return None
-        else:
-            for node in sll.getnode():
-                if node.item[0] == key:
-                    return node
-            probe_count += 1
-            self.search(key, probe_count)
+        return self.probe_slots(old_slots[0], old_slots[1], old_slots[3],
+                                key, strong_hash(key))[0]
 
     def __getitem__(self, key):
         """
@@ -447,9 +1537,12 @@ class OpenAddressHashDict(object):
         >>> openAdd[0]
         10
         """
-        node = self.search(key, 0)
-        if node is not None:
-            return node.item[1]
+        hash_index = self.search(key)
+        if hash_index is not None:
+            return self.slot_values[hash_index]
+        hash_index = self.search_old(key)
+        if hash_index is not None:
+            return self.old_slots[2][hash_index]
         else:
             return "Value not present."
 
@@ -463,41 +1556,174 @@ class OpenAddressHashDict(object):
         >>> print openAdd[11]
         20
         """
-        if not self.__contains__(key):
-            if self.load_factor >= self.max_load_factor:
+        if self.old_slots is not None:
+            self.migrate(self.migrate_step)
+        hash_code = strong_hash(key)
+        found_index, free_index = self.probe(key, hash_code)
+        if found_index is None and self.search_old(key) is None:
+            free_index = self.make_room(key, hash_code, free_index)
+            self.store(free_index, hash_code, key, value)
+            self.length += 1
+
+    def make_room(self, key, hash_code, free_index):
+        """
+        Resizes the table as needed before a new key goes in.
+        :param key: key about to be inserted
+        :param hash_code: strong_hash(key)
+        :param free_index: free bin the probe for the key found, or None
+        :return: free bin for the key
+        """
+        if self.load_factor >= self.max_load_factor:
+            if self.incremental:
+                # old bins move over during the next operations
+                self.start_migration(self.bin_count*2)
+            else:
                 self.rebuild(self.bin_count*2)
-            hash_index = self.get_hash_key(self.hash_array, key, 0, self.bin_count)
-            sll = SinglyLinkedList()
-            tup = (key, value)
-            sll.prepend(tup)
-            self.hash_array[hash_index] = sll
+            free_index = self.get_hash_key(self.slot_states, key, hash_code,
+                                           0, self.bin_count)
+        elif (Decimal(self.length + self.tombstone_count) /
+              Decimal(self.bin_count) >= self.max_load_factor):
+            self.rebuild(self.bin_count)  # too many tombstones, clear them out
+            free_index = self.get_hash_key(self.slot_states, key, hash_code,
+                                           0, self.bin_count)
+        if free_index is None:
+            free_index = self.grow_for(key, hash_code)
+        return free_index
+
+    def grow_for(self, key, hash_code):
+        """
+        Doubles the table, at most max_rebuild_growth times, until the key
+        finds a free bin. If that fails the table is left as it was and
+        RuntimeError is raised.
+        :param key: key about to be inserted
+        :param hash_code: strong_hash(key)
+        :return: free bin for the key
+        >>> table = OpenAddressHashDict(4, 0.9,
+        ...                             lambda key, probe, bin_count: 1,
+        ...                             max_probes=2)
+        >>> table['a'] = 1
+        >>> table['b'] = 2
+        Traceback (most recent call last):
+        ...
+        RuntimeError: hash function cannot place key 'b' within 2 probes
+        >>> table.bin_count, len(table), table['a']
+        (4, 1, 1)
+        """
+        saved = self.snapshot()
+        free_index = None
+        for growth in range(self.max_rebuild_growth):
+            if not self.growth_can_help(self.bin_count):
+                break
+            # no free bin within the probe limit, spread the keys wider
+            self.rebuild(self.bin_count*2)
+            free_index = self.get_hash_key(self.slot_states, key, hash_code,
+                                           0, self.bin_count)
+            if free_index is not None:
+                return free_index
+        self.restore(saved)
+        raise RuntimeError("hash function cannot place key %r within %d probes"
+                           % (key, self.probe_limit(self.bin_count)))
+
+    def bins_for(self, count):
+        """
+        Gives the smallest bin size holding the given number of items within
+        the maximum load factor.
+        :param count: number of items
+        :return: bin size
+        >>> OpenAddressHashDict(10, 0.7).bins_for(1000)
+        1429
+        """
+        bins = Decimal(count) / Decimal(self.max_load_factor)
+        return max(1, int(bins.to_integral_value(rounding=ROUND_CEILING)))
+
+    @classmethod
+    def from_items(cls, items, expected_size=None, unique_keys=False,
+                   **kwargs):
+        """
+        Builds a table sized once for the given key, value pairs.
+        :param items: mapping or iterable of (key, value) pairs
+        :param expected_size: number of pairs, taken from len(items) when not
+            given
+        :param unique_keys: the caller guarantees the keys do not repeat
+        :param kwargs: constructor arguments (bin_count, max_load, hashfunc,
+            ...)
+        :return: OpenAddressHashDict
+        >>> table = OpenAddressHashDict.from_items(('k%d' % i, i)
+        ...                                        for i in range(100))
+        >>> len(table), table.bin_count, table['k42']
+        (100, 143, 42)
+        """
+        table = cls(**kwargs)
+        table.update(items, expected_size, unique_keys)
+        return table
+
+    def update(self, items, expected_size=None, unique_keys=False):
+        """
+        Inserts many key, value pairs, resizing the table once up front instead
+        of rebuilding as it fills. Keys already present keep their value, as
+        with __setitem__.
+        :param items: mapping or iterable of (key, value) pairs
+        :param expected_size: number of pairs, taken from len(items) when not
+            given
+        :param unique_keys: the caller guarantees the keys neither repeat nor
+            are present, so they are not searched
+        :return: None
+        >>> table = OpenAddressHashDict(2, 0.7)
+        >>> table.update([('a', 1), ('b', 2), ('a', 3)])
+        >>> table.bin_count, len(table), table['a']
+        (5, 2, 1)
+        """
+        items, expected_size = sized_items(items, expected_size)
+        self.finish_migration()
+        count = self.length + expected_size
+        if (Decimal(count + self.tombstone_count) / Decimal(self.bin_count) >
+                Decimal(self.max_load_factor)):
+            self.rebuild(max(self.bin_count, self.bins_for(count)))
+        # beyond it, fall back to checked inserts
+        capacity = int(Decimal(self.max_load_factor) * self.bin_count)
+        for key, value in items:
+            hash_code = strong_hash(key)
+            if unique_keys:
+                free_index = self.get_hash_key(self.slot_states, key,
+                                               hash_code, 0, self.bin_count)
+            else:
+                found_index, free_index = self.probe(key, hash_code)
+                if found_index is not None:
+                    continue
+            if free_index is None or self.length >= capacity:
+                # more pairs than expected or a probe limit reached
+                self[key] = value
+                continue
+            self.store(free_index, hash_code, key, value)
             self.length += 1
 
     def __delitem__(self, key):
         """
-        Remove the key, value pair represented by the key from the hash table
+        Remove the key, value pair represented by the key from the hash table.
+        The bin becomes a tombstone so keys probed past it stay reachable.
         :param key: key to identify the pair
         :return: None
         >>> del openAdd[10]
         >>> print openAdd[10]
         Value not present.
         """
-        probe_count = 0
-        found = False
-        hash_index = self.hashing_func(key, probe_count, self.bin_count)
-        sll = self.hash_array[hash_index]
-        if sll is not None:
-            for node in sll.getnode():
-                if node.item[0] == key:
-                    found = True
-                    break
-                else:
-                    probe_count += 1
-                    hash_index = self.hashing_func(key, probe_count, self.bin_count)
-        if found:
-            if self.hash_array[hash_index] is not None:
-                self.hash_array[hash_index] = None
-                self.length -= 1
+        if self.old_slots is not None:
+            self.migrate(self.migrate_step)
+        hash_index = self.search(key)
+        if hash_index is not None:
+            self.slot_hashes[hash_index] = None
+            self.slot_keys[hash_index] = None
+            self.slot_values[hash_index] = None
+            self.slot_states[hash_index] = DELETED
+            self.tombstone_count += 1
+            self.length -= 1
+            return
+        hash_index = self.search_old(key)
+        if hash_index is not None:
+            hashes, keys, values, states = self.old_slots
+            hashes[hash_index] = keys[hash_index] = values[hash_index] = None
+            states[hash_index] = DELETED
+            self.length -= 1
 
     def __contains__(self, key):
         """
@@ -508,10 +1734,7 @@ class OpenAddressHashDict(object):
         >>> openAdd[2]
         10
         """
-        node = self.search(key, 0)
-        if node is not None:
-            return True
-        return False
+        return self.search(key) is not None or self.search_old(key) is not None
 
     def __len__(self):
         """
@@ -527,13 +1750,14 @@ class OpenAddressHashDict(object):
         Gives a string showing the table with multiple lines and items in each bin
         :return: String representing complete hash table.
         """
+        self.finish_migration()
         string_list = None
         for i in range(self.bin_count):
-            sll = self.hash_array[i]
-            if sll is None:
+            if self.slot_states[i] != OCCUPIED:
                 s = str(i) + ':' + str('None')
             else:
-                s = str(i) + ':' + "->".join([item for item in sll])
+                item = (self.slot_keys[i], self.slot_values[i])
+                s = str(i) + ':' + str(item)
             if string_list is None:
                 string_list = s
             else:
@@ -542,21 +1766,307 @@ class OpenAddressHashDict(object):
         return string_list
 
 
+class CacheEntry(object):
+    """
+    Entry of an LRUCache, linked into the cache's recency list through prev and
+    next.
+    """
+    __slots__ = ('key', 'value', 'size', 'expires', 'prev', 'next')
+
+    def __init__(self, key=None, value=None, size=0, expires=None):
+        self.key = key
+        self.value = value
+        self.size = size
+        # clock time the entry stops being valid, None for never
+        self.expires = expires
+        self.prev = self
+        self.next = self
+
+
+class LRUCache(object):
+    """
+    Bounded cache mapping keys to values, evicting the least recently used
+    entries. A ChainedHashDict finds the entry of a key and a circular doubly
+    linked list through the entries keeps them in recency order, so get, put
+    and evict are O(1).
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None,
+                 sizeof=sys.getsizeof, clock=time.time):
+        super(LRUCache, self).__init__()
+        # None: no limit on the number of entries
+        self.max_entries = max_entries
+        # None: no limit on the total size of the values
+        self.max_bytes = max_bytes
+        self.ttl = ttl  # default seconds an entry stays valid, None for ever
+        # size of a value in bytes, sys.getsizeof does not follow references
+        self.sizeof = sizeof
+        self.clock = clock
+        self.table = ChainedHashDict()
+        # root.next is the most recently used entry, root.prev the least
+        self.root = CacheEntry()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def unlink(self, entry):
+        """
+        Takes an entry out of the recency list.
+        :return: None
+        """
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+
+    def link_front(self, entry):
+        """
+        Puts an entry at the most recently used end of the recency list.
+        :return: None
+        """
+        root = self.root
+        entry.prev = root
+        entry.next = root.next
+        root.next.prev = entry
+        root.next = entry
+
+    def discard(self, entry):
+        """
+        Removes an entry from the table and the recency list.
+        :return: None
+        """
+        self.unlink(entry)
+        del self.table[entry.key]
+        self.total_bytes -= entry.size
+
+    def live_entry(self, key):
+        """
+        Gives the entry of a key, dropping it if its time to live has passed.
+        :param key: key to look up
+        :return: CacheEntry or None
+        """
+        node = self.table.find_node(key)
+        if node is None:
+            return None
+        entry = node.item[1]
+        if entry.expires is not None and self.clock() >= entry.expires:
+            self.discard(entry)
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, key, default=None):
+        """
+        Gives the value cached for a key and marks it most recently used.
+        :param key: key to look up
+        :param default: value returned on a miss
+        :return: cached value or default
+        >>> cache = LRUCache(max_entries=2)
+        >>> cache.put('a', 1)
+        >>> cache.put('b', 2)
+        >>> cache.get('a')
+        1
+        >>> cache.put('c', 3)
+        >>> cache.get('b'), cache.get('a'), cache.get('c')
+        (None, 1, 3)
+        >>> stats = cache.stats
+        >>> stats['hits'], stats['misses'], stats['evictions']
+        (3, 1, 1)
+        """
+        entry = self.live_entry(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self.root.next is not entry:
+            self.unlink(entry)
+            self.link_front(entry)
+        return entry.value
+
+    def put(self, key, value, ttl=None):
+        """
+        Caches a value for a key as the most recently used entry, then evicts
+        the least recently used entries until the cache is within its limits. A
+        value larger than max_bytes is not kept.
+        :param key: key of the value
+        :param value: value to cache
+        :param ttl: seconds the entry stays valid, the cache's ttl when not
+            given
+        :return: None
+        >>> now = [0]
+        >>> cache = LRUCache(ttl=10, clock=lambda: now[0])
+        >>> cache.put('a', 1)
+        >>> cache.put('b', 2, ttl=100)
+        >>> now[0] = 50
+        >>> cache.get('a'), cache.get('b'), cache.stats['expirations']
+        (None, 2, 1)
+        """
+        if ttl is None:
+            ttl = self.ttl
+        expires = None if ttl is None else self.clock() + ttl
+        size = self.sizeof(value)
+        node = self.table.find_node(key)
+        if node is not None:
+            entry = node.item[1]
+            self.unlink(entry)
+            self.total_bytes -= entry.size
+            entry.value, entry.size, entry.expires = value, size, expires
+        else:
+            entry = CacheEntry(key, value, size, expires)
+            self.table[key] = entry
+        self.link_front(entry)
+        self.total_bytes += size
+        self.evict()
+
+    def evict(self):
+        """
+        Drops least recently used entries while the cache is over a limit.
+        :return: None
+        >>> cache = LRUCache(max_bytes=10, sizeof=len)
+        >>> cache.put('a', 'xxxx')
+        >>> cache.put('b', 'yyyy')
+        >>> cache.put('c', 'zzzz')
+        >>> len(cache), cache.total_bytes, 'a' in cache
+        (2, 8, False)
+        """
+        root = self.root
+        while root.prev is not root and self.over_limit():
+            self.discard(root.prev)
+            self.evictions += 1
+
+    def over_limit(self):
+        """
+        Checks the entry count and total size against the limits.
+        :return: Boolean value
+        """
+        if self.max_entries is not None and len(self.table) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.total_bytes > self.max_bytes
+
+    def delete(self, key):
+        """
+        Removes the entry of a key if there is one.
+        :param key: key to remove
+        :return: None
+        """
+        node = self.table.find_node(key)
+        if node is not None:
+            self.discard(node.item[1])
+
+    def clear(self):
+        """
+        Removes every entry, keeping the counters.
+        :return: None
+        """
+        self.table = ChainedHashDict()
+        self.root.prev = self.root.next = self.root
+        self.total_bytes = 0
+
+    def __contains__(self, key):
+        """
+        Checks if a live entry is cached for the key without changing its
+        recency.
+        :param key: key to check
+        :return: Boolean value
+        """
+        return self.live_entry(key) is not None
+
+    def __len__(self):
+        """
+        Gives the number of cached entries, including expired ones not dropped
+        yet.
+        :return: Length
+        """
+        return len(self.table)
+
+    @property
+    def stats(self):
+        """
+        Gives the counters of the cache.
+        :return: dictionary with hits, misses, evictions, expirations, entries
+            and bytes
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self.table),
+                'bytes': self.total_bytes}
+
+
+# Separates positional from keyword arguments in the keys of cached functions
+kwd_mark = object()
+
+
+def cached(max_entries=128, max_bytes=None, ttl=None, sizeof=sys.getsizeof):
+    """
+    Decorator memoising a function in an LRUCache keyed on its arguments, which
+    must be hashable. The cache is available as the cache attribute of the
+    decorated function.
+    :return: decorator
+    >>> @cached(max_entries=10)
+    ... def square(x):
+    ...     print 'computing', x
+    ...     return x * x
+    >>> square(3)
+    computing 3
+    9
+    >>> square(3)
+    9
+    >>> square.cache.stats['hits']
+    1
+    >>> @cached()
+    ... def arguments(*args, **kwargs):
+    ...     return args, kwargs
+    >>> arguments(1, a=2)
+    ((1,), {'a': 2})
+    >>> arguments((1,), (('a', 2),))
+    (((1,), (('a', 2),)), {})
+    """
+    def decorator(function):
+        cache = LRUCache(max_entries, max_bytes, ttl, sizeof)
+        missing = CacheEntry()  # sentinel, None may be a cached result
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = args
+            if kwargs:
+                key += (kwd_mark,) + tuple(sorted(kwargs.items()))
+            result = cache.get(key, missing)
+            if result is missing:
+                result = function(*args, **kwargs)
+                cache.put(key, result)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+# Colours of the nodes of a balanced BinarySearchTreeDict
+RED = 0
+BLACK = 1
+
+
 class BinaryTreeNode(object):
-    def __init__(self, data=None, left=None, right=None, parent=None):
+    def __init__(self, data=None, left=None, right=None, parent=None,
+                 color=RED):
         super(BinaryTreeNode, self).__init__()
         self.data = data
         self.left = left
         self.right = right
         self.parent = parent
+        self.color = color  # only used by balanced trees
 
 
 class BinarySearchTreeDict(object):
-    def __init__(self):
+    def __init__(self, balanced=False):
         super(BinarySearchTreeDict, self).__init__()
         # initialize
         self.root = None
         self.length = 0
+        # True: kept a red-black tree, so the height stays within
+        # 2 log2(n + 1)
+        self.balanced = balanced
 
     def height_of_tree(self, root):
         """
@@ -730,6 +2240,147 @@ class BinarySearchTreeDict(object):
             else:
                 temp2.right = new_item
             self.length += 1
+            if self.balanced:
+                self.insert_fixup(new_item)
+
+    @staticmethod
+    def color_of(node):
+        """
+        Gives the colour of a node, missing children are black.
+        :param node: node or None
+        :return: RED or BLACK
+        """
+        return BLACK if node is None else node.color
+
+    def rotate(self, node, left):
+        """
+        Rotates a node down to the left or the right, the child on the other
+        side takes its place.
+        :param node: node to rotate
+        :param left: True for a left rotation
+        :return: None
+        """
+        child = node.right if left else node.left
+        inner = child.left if left else child.right
+        if left:
+            node.right = inner
+        else:
+            node.left = inner
+        if inner is not None:
+            inner.parent = node
+        self.transplant(node, child)
+        if left:
+            child.left = node
+        else:
+            child.right = node
+        node.parent = child
+
+    def insert_fixup(self, node):
+        """
+        Restores the red-black properties after inserting a red node.
+        :param node: node just inserted
+        :return: None
+        """
+        while node.parent is not None and node.parent.color == RED:
+            parent = node.parent
+            grandparent = parent.parent  # a red node is never the root
+            left = parent is grandparent.left
+            uncle = grandparent.right if left else grandparent.left
+            if self.color_of(uncle) == RED:
+                parent.color = uncle.color = BLACK
+                grandparent.color = RED
+                node = grandparent
+            else:
+                if node is (parent.right if left else parent.left):
+                    node = parent
+                    self.rotate(node, left)
+                    parent = node.parent
+                parent.color = BLACK
+                grandparent.color = RED
+                self.rotate(grandparent, not left)
+        self.root.color = BLACK
+
+    def delete_fixup(self, node, parent):
+        """
+        Restores the red-black properties after a black node was removed from
+        above node.
+        :param node: node that took the removed node's place, may be None
+        :param parent: parent of that place
+        :return: None
+        """
+        while node is not self.root and self.color_of(node) == BLACK:
+            left = node is parent.left
+            sibling = parent.right if left else parent.left
+            if sibling.color == RED:
+                sibling.color = BLACK
+                parent.color = RED
+                self.rotate(parent, left)
+                sibling = parent.right if left else parent.left
+            if left:
+                near, far = sibling.left, sibling.right
+            else:
+                near, far = sibling.right, sibling.left
+            if self.color_of(near) == BLACK and self.color_of(far) == BLACK:
+                sibling.color = RED
+                node = parent
+                parent = node.parent
+            else:
+                self.rotate_far_sibling(parent, sibling, left)
+                node = self.root
+        if node is not None:
+            node.color = BLACK
+
+    def rotate_far_sibling(self, parent, sibling, left):
+        """
+        Finishes a delete fixup when the sibling has a red child.
+        :param parent: parent of the place lacking a black node
+        :param sibling: other child of parent, black
+        :param left: True when the place is the left child
+        :return: None
+        """
+        if self.color_of(sibling.right if left else sibling.left) == BLACK:
+            near = sibling.left if left else sibling.right
+            near.color = BLACK
+            sibling.color = RED
+            self.rotate(sibling, not left)
+            sibling = parent.right if left else parent.left
+        sibling.color = parent.color
+        parent.color = BLACK
+        far = sibling.right if left else sibling.left
+        far.color = BLACK
+        self.rotate(parent, left)
+
+    def black_height(self, node=None):
+        """
+        Checks the red-black properties below a node.
+        :param node: root of the sub tree, the root of the tree when not given
+        :return: number of black nodes on every path down to a missing child
+        >>> balanced = BinarySearchTreeDict(balanced=True)
+        >>> for key in range(1, 20):
+        ...     balanced[key] = key * 2
+        >>> for key in range(1, 20, 3):
+        ...     del balanced[key]
+        >>> (len(balanced), balanced.height, balanced.black_height(),
+        ...  balanced[11])
+        (12, 4, 3, 22)
+        """
+        if node is None:
+            node = self.root
+            if node is None:
+                return 0
+            assert node.color == BLACK, "the root is black"
+        heights = []
+        for child in (node.left, node.right):
+            if child is None:
+                heights.append(0)
+                continue
+            assert child.parent is node, "parent links are consistent"
+            assert node.color == BLACK or child.color == BLACK, \
+                "a red node has black children"
+            heights.append(self.black_height(child))
+        assert heights[0] == heights[1], \
+            "every path has the same number of black nodes"
+        return heights[0] + (1 if node.color == BLACK else 0)
 
     @staticmethod
     def tree_minimum(node):
@@ -776,22 +2427,42 @@ class BinarySearchTreeDict(object):
             return False
         temp1 = self.search_node(temp1, key)
         if temp1 is not None:
-            if temp1.left is None:
-                self.transplant(temp1, temp1.right)
-            elif temp1.right is None:
-                self.transplant(temp1, temp1.left)
-            else:
-                temp2 = self.tree_minimum(temp1.right)
-                if temp2.parent != temp1:
-                    self.transplant(temp2, temp2.right)
-                    temp2.right = temp1.right
-                    temp3 = temp2.right
-                    temp3.parent = temp2
-                self.transplant(temp1, temp2)
-                temp2.left = temp1.left
-                temp3 = temp2.left
-                temp3.parent = temp2
+            replacement, parent, removed_color = self.remove_node(temp1)
             self.length -= 1
+            if self.balanced and removed_color == BLACK:
+                self.delete_fixup(replacement, parent)
+
+    def remove_node(self, temp1):
+        """
+        Unlinks a node, its successor taking its place when it has two
+        children.
+        :param temp1: node to remove
+        :return: (node moved into the place the tree lost a node from or None,
+            parent of that place, colour of the node that left that place)
+        """
+        removed_color = temp1.color
+        if temp1.left is None:
+            replacement, parent = temp1.right, temp1.parent
+            self.transplant(temp1, temp1.right)
+        elif temp1.right is None:
+            replacement, parent = temp1.left, temp1.parent
+            self.transplant(temp1, temp1.left)
+        else:
+            temp2 = self.tree_minimum(temp1.right)
+            removed_color = temp2.color
+            replacement, parent = temp2.right, temp2
+            if temp2.parent != temp1:
+                parent = temp2.parent
+                self.transplant(temp2, temp2.right)
+                temp2.right = temp1.right
+                temp3 = temp2.right
+                temp3.parent = temp2
+            self.transplant(temp1, temp2)
+            temp2.left = temp1.left
+            temp3 = temp2.left
+            temp3.parent = temp2
+            temp2.color = temp1.color
+        return (replacement, parent, removed_color)
 
     def __contains__(self, key):
         """
@@ -832,17 +2503,81 @@ class BinarySearchTreeDict(object):
         self.preorder_keys()
 
 
+def migration_step(old_bins, inserts_left, rehash_step):
+    """
+    Gives the number of old bins each insert and delete must migrate so an
+    incremental resize completes within the inserts left before the next one.
+    :param old_bins: number of bins to migrate
+    :param inserts_left: inserts before the new bins reach the maximum load
+    :param rehash_step: smallest number of bins to migrate
+    :return: bins to migrate per operation
+    >>> migration_step(40, 14, 1), migration_step(40, 14, 4)
+    (3, 4)
+    """
+    inserts_left = max(inserts_left, 1)
+    return max(rehash_step, (old_bins + inserts_left - 1) // inserts_left)
+
+
+def sized_items(items, expected_size=None):
+    """
+    Prepares the argument of a bulk load.
+    :param items: mapping or iterable of (key, value) pairs
+    :param expected_size: number of pairs, or None to count them
+    :return: (iterable of (key, value) pairs, number of pairs)
+    """
+    if hasattr(items, 'items'):
+        items = items.items()
+    if expected_size is None:
+        if not hasattr(items, '__len__'):
+            items = list(items)
+        expected_size = len(items)
+    return items, expected_size
+
+
+MASK64 = (1 << 64) - 1
+
+
+def strong_hash(key):
+    """
+    Well distributed 64 bit hash code of any hashable key (str, bytes, tuples,
+    ...). The built-in hash, which str objects cache, is passed through the
+    splitmix64 finaliser so every bit of the result depends on every bit of the
+    key's hash.
+    :param key: hashable key
+    :return: hash code
+    >>> [int(strong_hash(i) % 1000) for i in range(5)]
+    [0, 789, 730, 856, 252]
+    >>> strided = [i * 10 for i in range(10)]
+    >>> len(set(k % 10 for k in strided))
+    1
+    >>> len(set(strong_hash(k) % 10 for k in strided))
+    5
+    >>> pair = strong_hash((1, 2))
+    >>> pair == strong_hash((1, 2)), pair == strong_hash((2, 1))
+    (True, False)
+    """
+    h = hash(key) & MASK64
+    h = ((h ^ (h >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    h = ((h ^ (h >> 27)) * 0x94d049bb133111eb) & MASK64
+    return h ^ (h >> 31)
+
+
 def chaining_hash_func(key, bin_count):
     """
-    Hash function that generates hash index for chained hash tables.
+    Hash function that generates hash index for chained hash tables. Integers
+    map to themselves modulo the bin count, other keys go through strong_hash.
     :param key: the value for which hash index should be calculated
     :param bin_count: Hash Table capacity
     :return: Hash Index
+    >>> chaining_hash_func(12, 10)
+    2
+    >>> chaining_hash_func('apple', 10) == strong_hash('apple') % 10
+    True
     """
     if isinstance(key, int):
         hash_value = key % bin_count
     else:
-        hash_value = ord(key) % bin_count
+        hash_value = strong_hash(key) % bin_count
     return hash_value
 
 
@@ -875,12 +2610,285 @@ def terrible_hash(bin):
     :return:
         A python function that can be passes into the constructor
         of a hash table to use for hashing objects.
+
+    Used for open addressing the probe still moves on linearly from that
+    bin, so colliding keys are placed one after the other:
+
+    >>> table = OpenAddressHashDict(4, 0.9, terrible_hash(1))
+    >>> for key in 'abc':
+    ...     table[key] = key
+    >>> print table.display()
+    0:None
+    1:('a', 'a')
+    2:('b', 'b')
+    3:('c', 'c')
+
+    A hash function that ignores the probe cannot place a second key, the
+    table is left as it was:
+
+    >>> table = OpenAddressHashDict(4, 0.9, lambda key, probe, bin_count: 1)
+    >>> table['a'] = 1
+    >>> table['b'] = 2
+    Traceback (most recent call last):
+    ...
+    RuntimeError: hash function cannot place key 'b' within 4 probes
+    >>> table.bin_count, len(table)
+    (4, 1)
     """
-    def hashfunc(x, item):
+    def hashfunc(x, *probe_and_bin_count):
+        # open addressing: (probe, bin_count)
+        if len(probe_and_bin_count) == 2:
+            probe, bin_count = probe_and_bin_count
+            return (bin + probe) % bin_count
         return bin
     return hashfunc
 
 
+def stress_writer(table, owner, keys_per_thread, rounds):
+    """
+    Inserts the keys (owner, i), then deletes the even ones, rounds times.
+    :return: None
+    """
+    for round_number in range(rounds):
+        for i in range(keys_per_thread):
+            table[(owner, i)] = ((owner, i), round_number)
+        for i in range(0, keys_per_thread, 2):
+            del table[(owner, i)]
+
+
+def stress_reader(table, owner, keys_per_thread, done, errors):
+    """
+    Looks up the keys of a writer until done is set, collecting any value
+    stored under another key.
+    :return: None
+    """
+    while not done.is_set():
+        for i in range(keys_per_thread):
+            value = table[(owner, i)]
+            if value != "Value not present." and value[0] != (owner, i):
+                errors.append(((owner, i), value))
+
+
+def stress_concurrent_hash_dict(threads=8, keys_per_thread=500, rounds=3):
+    """
+    Writer threads insert, update and delete their own keys in a shared
+    ConcurrentChainedHashDict while reader threads check every value they find
+    is one some writer stored for that key.
+    :param threads: number of writer threads, as many readers run alongside
+    :param keys_per_thread: keys owned by each writer
+    :param rounds: insert, update and delete rounds per writer
+    :return: the table, holding the odd keys of every writer
+    >>> table = stress_concurrent_hash_dict(4, 100, 2)
+    >>> len(table), table[(3, 99)]
+    (200, ((3, 99), 1))
+    """
+    table = ConcurrentChainedHashDict(2, 0.7)
+    errors = []
+    done = threading.Event()
+    writers = [threading.Thread(target=stress_writer,
+                                args=(table, owner, keys_per_thread, rounds))
+               for owner in range(threads)]
+    readers = [threading.Thread(target=stress_reader,
+                                args=(table, owner, keys_per_thread, done,
+                                      errors))
+               for owner in range(threads)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+    assert not errors, errors[:5]
+    assert len(table) == threads * (keys_per_thread // 2)
+    for owner in range(threads):
+        for i in range(keys_per_thread):
+            assert (i % 2 == 1) == ((owner, i) in table)
+    return table
+
+
+def benchmark_concurrent_hash_dict(thread_counts=(1, 2, 4, 8), keys=10000,
+                                   operations=20000, read_ratio=0.9):
+    """
+    Measures the throughput of a ConcurrentChainedHashDict shared by a growing
+    number of threads doing a mix of lookups and updates. Under CPython's
+    global interpreter lock pure Python code does not run in parallel, so there
+    the numbers show the cost of the locking rather than a speedup.
+    :param thread_counts: thread counts to measure
+    :param keys: number of keys loaded before measuring
+    :param operations: operations done by each thread
+    :param read_ratio: fraction of the operations that are lookups
+    :return: list of (threads, seconds, operations per second)
+    """
+    table = ConcurrentChainedHashDict.from_items(((i, i) for i in range(keys)),
+                                                 keys)
+    results = []
+
+    def work(seed):
+        rng = random.Random(seed)
+        for n in range(operations):
+            key = rng.randrange(keys)
+            if rng.random() < read_ratio:
+                table[key]
+            else:
+                table[key] = n
+
+    for count in thread_counts:
+        workers = [threading.Thread(target=work, args=(seed,))
+                   for seed in range(count)]
+        start = time.time()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        seconds = time.time() - start
+        throughput = count * operations / seconds if seconds else float('inf')
+        results.append((count, seconds, throughput))
+    return results
+
+
+def benchmark_keys(distribution, count, rng):
+    """
+    Generates keys for the hash table benchmark.
+    :param distribution: 'sequential' integers, 'random' integers, 'strided'
+        multiples of 10 or 'strings'
+    :param count: number of keys
+    :param rng: random.Random
+    :return: list of distinct keys
+    >>> benchmark_keys('strided', 4, random.Random(0))
+    [0, 10, 20, 30]
+    """
+    if distribution == 'sequential':
+        return range(count)
+    if distribution == 'random':
+        return rng.sample(xrange(count * 100), count)
+    if distribution == 'strided':
+        # all in one bin of a 10 bin table under key % bin_count
+        return [i * 10 for i in range(count)]
+    if distribution == 'strings':
+        return ['key%d' % i for i in range(count)]
+    raise ValueError("unknown key distribution %r" % distribution)
+
+
+def benchmark_row(table, name, distribution, hash_name, max_load, keys):
+    """
+    Inserts then looks up every key in a table, timing both passes.
+    :return: dictionary with the settings, insert_ops and lookup_ops per
+        second, the table_stats figures and error, the message of a
+        RuntimeError that stopped the inserts
+    """
+    row = {'table': name, 'keys': distribution, 'hash': hash_name,
+           'max_load': max_load, 'count': len(keys), 'error': None}
+    start = time.time()
+    try:
+        for key in keys:
+            table[key] = key
+    except RuntimeError as error:
+        row['error'] = str(error)
+        return row
+    middle = time.time()
+    if hasattr(table, 'reset_probe_stats'):
+        table.reset_probe_stats()  # count the probes of the lookups only
+    for key in keys:
+        table[key]
+    end = time.time()
+    row['insert_ops'] = (len(keys) / (middle - start) if middle > start
+                         else float('inf'))
+    row['lookup_ops'] = (len(keys) / (end - middle) if end > middle
+                         else float('inf'))
+    if hasattr(table, 'table_stats'):
+        stats = table.table_stats
+        for field in ('average_probes', 'longest', 'rebuilds',
+                      'rebuild_seconds'):
+            row[field] = stats[field]
+    return row
+
+
+def benchmark_hash_tables(count=2000,
+                          distributions=('sequential', 'random', 'strided',
+                                         'strings'),
+                          load_factors=(0.5, 0.7, 0.9),
+                          hash_names=('strong', 'assignment', 'terrible'),
+                          terrible_count=200, seed=0):
+    """
+    Compares ChainedHashDict and OpenAddressHashDict with the built-in dict
+    over key distributions, maximum load factors and hash functions:
+    strong_hash ('strong'), the assignment's hash functions ('assignment') and
+    terrible_hash ('terrible', run on the first terrible_count keys only).
+    :return: list of rows, see benchmark_row
+    >>> rows = benchmark_hash_tables(50, ('strided',), (0.7,),
+    ...                              ('assignment', 'terrible'), 20)
+    >>> [(row['table'], row['hash'], row.get('longest'), row['error'] is None)
+    ...  for row in rows]
+    ... # doctest: +NORMALIZE_WHITESPACE
+    [('dict', None, None, True),
+     ('ChainedHashDict', 'assignment', 7, True),
+     ('ChainedHashDict', 'terrible', 20, True),
+     ('OpenAddressHashDict', 'assignment', 7, True),
+     ('OpenAddressHashDict', 'terrible', 20, True)]
+
+    Both tables are measured under terrible_hash for every distribution and
+    load factor:
+
+    >>> rows = benchmark_hash_tables(40, load_factors=(0.5, 0.9),
+    ...                              hash_names=('terrible',),
+    ...                              terrible_count=40)
+    >>> [row['error'] for row in rows if row['error'] is not None]
+    []
+    >>> all(row['lookup_ops'] > 0 for row in rows)
+    True
+    >>> sorted(set(row['average_probes'] for row in rows
+    ...            if row['table'] == 'OpenAddressHashDict'))
+    [20.5]
+    """
+    rng = random.Random(seed)
+    rows = []
+    for distribution in distributions:
+        keys = benchmark_keys(distribution, count, rng)
+        rows.append(benchmark_row(dict(), 'dict', distribution, None, None,
+                                  keys))
+        for table_class, assignment_hash in (
+                (ChainedHashDict, chaining_hash_func),
+                (OpenAddressHashDict, open_addressing_hash_func)):
+            for hash_name in hash_names:
+                hashfunc = {'strong': None, 'assignment': assignment_hash,
+                            'terrible': terrible_hash(0)}[hash_name]
+                if hash_name == 'terrible':
+                    sample = keys[:terrible_count]
+                else:
+                    sample = keys
+                for max_load in load_factors:
+                    table = table_class(10, max_load, hashfunc)
+                    rows.append(benchmark_row(table, table_class.__name__,
+                                              distribution, hash_name,
+                                              max_load, sample))
+    return rows
+
+
+def print_hash_benchmark(rows):
+    """
+    Prints the rows of benchmark_hash_tables as a table.
+    :return: None
+    """
+    row_format = '%-20s %-10s %-10s %5s %6s %12s %12s %8s %7s %8s'
+    print row_format % ('table', 'keys', 'hash', 'load', 'count', 'insert/s',
+                        'lookup/s', 'probes', 'longest', 'rebuilds')
+    for row in rows:
+        settings = (row['table'], row['keys'], row['hash'] or '-',
+                    row['max_load'] or '-', row['count'])
+        if row['error'] is not None:
+            print '%-20s %-10s %-10s %5s %6s ' % settings + row['error']
+            continue
+        if 'average_probes' in row:
+            probes = '%.2f' % row['average_probes']
+        else:
+            probes = '-'
+        print row_format % (settings + ('%d' % row['insert_ops'],
+                                        '%d' % row['lookup_ops'], probes,
+                                        row.get('longest', '-'),
+                                        row.get('rebuilds', '-')))
+
+
 def testing_singly_linked_list():
     # Singly Linked List testing
     singlyLL = SinglyLinkedList()
@@ -912,6 +2920,19 @@ def testing_singly_linked_list():
     print ' '
 
 
+def testing_unrolled_linked_list():
+    unrolled = UnrolledLinkedList(node_capacity=16)
+    for i in range(1, 200):
+        unrolled.append(random.randrange(1, 500))
+    print ('length = ' + str(len(unrolled)) + ', nodes = ' +
+           str(unrolled.node_count))
+    for item in list(unrolled)[::2]:
+        unrolled.remove(item)
+    print ('After Delete: length = ' + str(len(unrolled)) + ', nodes = ' +
+           str(unrolled.node_count))
+    print ' '
+
+
 def testing_chained_hash_dictionary():
     chd = ChainedHashDict(10, 0.8, chaining_hash_func)
     for i in range(0, 9):
@@ -957,6 +2978,20 @@ def testing_open_addressing_hash_dictionary():
     print oahd.display()
 
 
+def testing_concurrent_hash_dictionary():
+    table = stress_concurrent_hash_dict()
+    print ('stress test passed with ' + str(len(table)) + ' keys in ' +
+           str(table.bin_count) + ' bins')
+    results = benchmark_concurrent_hash_dict(keys=2000, operations=5000)
+    for threads, seconds, throughput in results:
+        print '%d threads: %.3f s, %d ops/s' % (threads, seconds, throughput)
+
+
+def testing_hash_table_benchmark():
+    print_hash_benchmark(benchmark_hash_tables(500, load_factors=(0.7,),
+                                               terrible_count=50))
+
+
 def testing_binary_search_tree():
     # Binary Search Tree testing
     bst = BinarySearchTreeDict()
@@ -978,6 +3013,11 @@ def testing_binary_search_tree():
     print " "
     del bst[1]
     print (bst[1])
+    balanced = BinarySearchTreeDict(balanced=True)
+    for i in range(1, 20):
+        balanced[i] = random.randrange(1, 500)
+    print ('balanced height = ' + str(balanced.height) +
+           ', unbalanced height = ' + str(bst.height))
 
 
 def main():
@@ -995,8 +3035,11 @@ def main():
     #       as a result of deleting another key
 
     testing_singly_linked_list()
+    testing_unrolled_linked_list()
     testing_chained_hash_dictionary()
     testing_open_addressing_hash_dictionary()
+    testing_concurrent_hash_dictionary()
+    testing_hash_table_benchmark()
     testing_binary_search_tree()
     import doctest
     doctest.testmod(verbose=1, extraglobs={'tree': BinarySearchTreeDict(),